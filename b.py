@@ -3,6 +3,7 @@ import requests
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import time
+from link_extract import extract, has_rel
 
 class WebsiteDownloader:
     def __init__(self, base_url):
@@ -34,40 +35,29 @@ class WebsiteDownloader:
     
     def extract_assets(self, soup, page_url):
         """Extract all assets from HTML"""
-        assets = []
-        
-        # CSS files
-        for link in soup.find_all('link', rel='stylesheet'):
-            href = link.get('href')
-            if href:
-                assets.append(urljoin(page_url, href))
-        
-        # JavaScript files
-        for script in soup.find_all('script', src=True):
-            assets.append(urljoin(page_url, script['src']))
-        
-        # Images
-        for img in soup.find_all('img', src=True):
-            assets.append(urljoin(page_url, img['src']))
-        
-        # Favicon
-        for link in soup.find_all('link', rel='icon'):
-            href = link.get('href')
-            if href:
-                assets.append(urljoin(page_url, href))
-        
-        # Background images in CSS
-        for tag in soup.find_all(style=True):
-            style = tag['style']
-            # Simple extraction of url() from style
-            if 'url(' in style:
-                start = style.find('url(') + 4
-                end = style.find(')', start)
-                if start != -1 and end != -1:
-                    url_content = style[start:end].strip('"\'')
-                    assets.append(urljoin(page_url, url_content))
-        
-        return assets
+        # One walk over the tree; grouped CSS, JS, images, favicons, inline styles as before
+        css, scripts, images, icons, backgrounds = [], [], [], [], []
+        wanted = {'link': ('href',), 'script': ('src',), 'img': ('src',), '*': ('style',)}
+        for tag, attr, value, attrs in extract(soup, wanted):
+            if attr == 'style':
+                # Background images in CSS: simple extraction of url() from style
+                if 'url(' in value:
+                    start = value.find('url(') + 4
+                    end = value.find(')', start)
+                    if start != -1 and end != -1:
+                        url_content = value[start:end].strip('"\'')
+                        backgrounds.append(urljoin(page_url, url_content))
+            elif tag == 'script':
+                scripts.append(urljoin(page_url, value))
+            elif tag == 'img':
+                images.append(urljoin(page_url, value))
+            else:
+                if has_rel(attrs, 'stylesheet'):
+                    css.append(urljoin(page_url, value))
+                if has_rel(attrs, 'icon'):
+                    icons.append(urljoin(page_url, value))
+        
+        return css + scripts + images + icons + backgrounds
     
     def save_html(self, url, content, filename):
         """Save HTML content and modify links for local viewing"""
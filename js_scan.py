@@ -0,0 +1,116 @@
+"""Single-pass URL scanner for JavaScript (inline <script> code or downloaded bundles).
+
+One precompiled regex walks the source once and yields every string and template
+literal, stepping over comments and regex literals; each literal is then classified by a look at the few characters before it
+(fetch(, axios.get(, .open('GET', "url":, array items) and by its own shape. The
+literal alternatives never overlap, so there is no backtracking across the bundle:
+cost is linear in its size, unlike the old '=\\s*\\[(.*?)\\]' DOTALL passes.
+HTML pages go through scan_html(): <script> bodies are scanned as code, the markup
+around them for quoted strings only (a '//' or '</' in markup is not JavaScript).
+"""
+import re
+
+# "..." and '...' stop at a newline, `...` may span lines; escapes are skipped whole.
+# Written as [^q\\]*(?:\\.[^q\\]*)* so the plain runs are consumed without per-character alternation.
+STRINGS = r'"([^"\\\n]*(?:\\.[^"\\\n]*)*)"|\'([^\'\\\n]*(?:\\.[^\'\\\n]*)*)\'|`([^`\\]*(?:\\.[^`\\]*)*)`'
+LITERAL = re.compile(STRINGS, re.DOTALL)
+# Code also consumes comments and regex literals, so a quote inside /"/g or
+# "// don't" can't throw off the pairing for the rest of a one-line bundle.
+# An unclosed /* runs to the end (\Z) instead of failing and being retried.
+# A '/' starts a regex only right after an operator/punctuator or 'return' (at most one
+# space between: lookbehinds are fixed width); after an identifier, number, ')', ']'
+# or a postfix '++'/'--' (i++/2) it is division. Every alternative starts with a
+# quote or '/', so the scan only stops at those characters.
+CODE = re.compile(
+    STRINGS +
+    r'|//[^\n]*'
+    r'|/\*.*?(?:\*/|\Z)'
+    r'|/(?:(?<=[(,=:\[!&|?{};+\-*%<>~^]/)|(?<=[(,=:\[!&|?{};+\-*%<>~^]\s/)|(?<=\breturn /)|(?<![\s\S]{2}))'
+    r'(?<!\+\+/)(?<!--/)(?<!\+\+\s/)(?<!--\s/)'
+    r'(?![/*])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*',
+    re.DOTALL
+)
+SCRIPT_TAG = re.compile(r'<script\b[^>]*>|</script\s*>', re.IGNORECASE)
+
+# Only this many characters before a literal are looked at
+CONTEXT = 40
+# Longer literals are code or data blobs, not URLs
+MAX_LITERAL = 2048
+
+ENDPOINT_CALL = re.compile(
+    r'(?:(?:\bfetch|\baxios(?:\.(?:get|post|put|patch|delete|head|request))?|\.get|\.post)\(|'
+    r'\.open\(\s*[\'"](?:GET|POST|PUT|PATCH|DELETE|HEAD)[\'"]\s*,)\s*$'
+)
+URL_KEY = re.compile(r'\b(?:url|src|href|file|path)[\'"]?\s*:\s*$')
+ARRAY_ITEM = re.compile(r'[\[,]\s*$')
+
+ASSET_EXTENSIONS = ('.html', '.css', '.js', '.json', '.txt', '.xml')
+WHITESPACE = re.compile(r'\s')
+
+def literals(source, code=True):
+    """(start, value) of every string/template literal, in order. code=False looks
+    for quoted strings only (markup around <script> blocks)."""
+    for match in (CODE if code else LITERAL).finditer(source):
+        value = match.group(1)
+        if value is None:
+            value = match.group(2)
+        if value is None:
+            # a template, or a comment/regex literal (no group) that is just skipped
+            value = match.group(3)
+        if value and len(value) <= MAX_LITERAL:
+            yield match.start(), value
+
+def classify(source, start, value):
+    """'endpoint', 'asset', 'template' or None for the literal at source[start].
+    'template' is an endpoint built with ${...}: only known at runtime, so it can be
+    reported (like api_endpoints.txt) but not fetched."""
+    # Every URL shape below has a '/' or an extension; most literals are neither
+    if '/' not in value and '.' not in value:
+        return None
+    before = source[max(0, start - CONTEXT):start]
+    if '${' in value:
+        return 'template' if ENDPOINT_CALL.search(before) else None
+    if ENDPOINT_CALL.search(before) or URL_KEY.search(before):
+        # map.get('key') style calls are not requests: want something path-like
+        if '/' in value or value.endswith(ASSET_EXTENSIONS):
+            return 'endpoint'
+        return None
+    if WHITESPACE.search(value):
+        return None
+    if value.endswith(ASSET_EXTENSIONS) and '/' in value:
+        return 'asset'
+    # batch file lists: ['batch1.js', 'batch2.json', ...]
+    if ARRAY_ITEM.search(before) and any(extension in value for extension in ASSET_EXTENSIONS):
+        return 'asset'
+    return None
+
+def scan(source, code=True):
+    """(kind, value) of every URL-looking literal in the JavaScript source"""
+    found = []
+    for start, value in literals(source, code):
+        kind = classify(source, start, value)
+        if kind:
+            found.append((kind, value.replace('\\/', '/')))
+    return found
+
+def scan_html(html):
+    """scan() for an HTML page: <script> bodies as code, everything else (tags,
+    attributes, text) for quoted strings only. One pass over the <script> tags."""
+    found = []
+    position = 0
+    in_script = False
+    for match in SCRIPT_TAG.finditer(html):
+        closing = match.group().startswith('</')
+        if closing != in_script:
+            # <script> inside a script or a stray </script> in markup: not a boundary
+            continue
+        if closing:
+            found += scan(html[position:match.start()], code=True)
+            position = match.start()
+        else:
+            # the opening tag stays with the markup: its src="..." is a quoted string
+            found += scan(html[position:match.end()], code=False)
+            position = match.end()
+        in_script = not closing
+    found += scan(html[position:], code=in_script)
+    return found
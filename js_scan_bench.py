@@ -0,0 +1,131 @@
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import js_scan
+
+# extract_urls_from_javascript before js_scan: ~20 whole-content regex passes
+OLD_PATTERNS = [
+    r'fetch\([\'"]([^\'"]+)[\'"]\)',
+    r'\.open\([\'"]GET[\'"],\s*[\'"]([^\'"]+)[\'"]\)',
+    r'\.open\([\'"]POST[\'"],\s*[\'"]([^\'"]+)[\'"]\)',
+    r'axios\.(?:get|post)\([\'"]([^\'"]+)[\'"]\)',
+    r'\.get\([\'"]([^\'"]+)[\'"]\)',
+    r'\.post\([\'"]([^\'"]+)[\'"]\)',
+    r'[\'\"](/[^\'\"\s]+\.(?:html|css|js|json|txt|xml))[\'\"]',
+    r'[\'\"](\./[^\'\"\s]+\.(?:html|css|js|json|txt|xml))[\'\"]',
+    r'[\'\"](\.\.[^\'\"\s]+\.(?:html|css|js|json|txt|xml))[\'\"]',
+    r'[\'\"]([^\'\"\s]+/[\w\-]+\.(?:html|css|js|json|txt|xml))[\'\"]',
+    r'[\'"]url[\'"]\s*:\s*[\'"]([^\'"]+)[\'"]',
+    r'[\'"]src[\'"]\s*:\s*[\'"]([^\'"]+)[\'"]',
+    r'[\'"]href[\'"]\s*:\s*[\'"]([^\'"]+)[\'"]',
+    r'[\'"]file[\'"]\s*:\s*[\'"]([^\'"]+)[\'"]',
+    r'[\'"]path[\'"]\s*:\s*[\'"]([^\'"]+)[\'"]',
+]
+OLD_ARRAY_PATTERNS = [
+    r'=\s*\[(.*?)\]',
+    r'const\s+\w+\s*=\s*\[(.*?)\]',
+    r'let\s+\w+\s*=\s*\[(.*?)\]',
+    r'var\s+\w+\s*=\s*\[(.*?)\]',
+]
+
+# Bundle idioms that break naive quote pairing: quotes inside regex literals and comments
+PARITY_CASES = [
+    'a=e.replace(/"/g,"&quot;");fetch("/api/data.json");var x={url:"/static/app.js"};',
+    "s=s.replace(/'/g,\"&#39;\");fetch('/api/users.json');var f=['batch1.js','batch2.json'];",
+    "t=/[\"']/.test(v)?'/p/a.html':'/p/b.html';var y='/static/y.css'",
+    "// don't cache\nfetch('/api/items.json');/* it's fine */var z='/static/z.js';",
+    "function q(v){return /\"/.test(v)}axios.get('/api/q.json');var w=a/b/c;var u='/static/u.js'",
+    'var r=i++/2;fetch("/api/b.json");var q="/c/d.js";n=k-- / 3;var s="/c/e.js"',
+    '<p>Don\'t miss http://example.com</p><script>a=b.replace(/"/g,"");fetch("/api/h.json")</script>'
+    '<div data-page="/p/c.html"></div>',
+]
+
+def old_scan(content):
+    found = set()
+    for pattern in OLD_PATTERNS:
+        found.update(re.findall(pattern, content))
+    for pattern in OLD_ARRAY_PATTERNS:
+        for match in re.findall(pattern, content, re.DOTALL):
+            for item in re.findall(r'[\'"]([^\'"]+)[\'"]', match):
+                if any(ext in item for ext in ['.html', '.css', '.js', '.txt', '.json', '.xml']):
+                    found.add(item)
+    return found
+
+def new_scan(content):
+    return {value for kind, value in js_scan.scan(content) if kind != 'template'}
+
+def new_scan_html(content):
+    return {value for kind, value in js_scan.scan_html(content) if kind != 'template'}
+
+def timed(function, content):
+    started = time.perf_counter()
+    result = function(content)
+    return time.perf_counter() - started, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Old regex battery vs js_scan on a real bundle, repeated to grow it")
+    parser.add_argument('bundle', nargs='?', default='utk.txt', help="JavaScript file (default: the scraped React bundle)")
+    parser.add_argument('--copies', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--old-limit', type=int, default=16, help="largest copy count to run the old regexes on")
+    parser.add_argument('--unclosed', type=int, nargs='+', default=[2000, 4000, 8000],
+                        help="sizes of the unclosed 'v=[0,' worst case for the DOTALL array regexes")
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    bundle = Path(args.bundle).read_text(encoding='utf-8', errors='replace')
+    print("🧪 JAVASCRIPT URL SCAN BENCHMARK")
+    print("=" * 60)
+    print(f"{'MB':>7} {'scan ms':>9} {'ms/MB':>7} {'regex ms':>9} {'ms/MB':>7} {'urls':>6}")
+    results = []
+    for copies in args.copies:
+        # Copies joined with ';' like a concatenated bundle
+        content = ';\n'.join([bundle] * copies)
+        megabytes = len(content) / 1e6
+        elapsed, new = timed(new_scan, content)
+        row = {'copies': copies, 'mb': round(megabytes, 2), 'scan_ms': round(elapsed * 1000, 1),
+               'scan_ms_per_mb': round(elapsed * 1000 / megabytes, 1), 'urls': len(new)}
+        if copies <= args.old_limit:
+            elapsed, old = timed(old_scan, content)
+            row['regex_ms'] = round(elapsed * 1000, 1)
+            row['regex_ms_per_mb'] = round(elapsed * 1000 / megabytes, 1)
+            row['regex_urls'] = len(old)
+            row['missed'] = sorted(old - new)
+        results.append(row)
+        print(f"{row['mb']:>7} {row['scan_ms']:>9} {row['scan_ms_per_mb']:>7} "
+              f"{row.get('regex_ms', '-'):>9} {row.get('regex_ms_per_mb', '-'):>7} {row['urls']:>6}")
+
+    # '=\s*\[(.*?)\]' rescans to the end for every '=[' that has no ']': quadratic
+    print(f"\n{'unclosed':>9} {'KB':>6} {'scan ms':>9} {'regex ms':>9}")
+    for count in args.unclosed:
+        content = 'v=[0,' * count
+        scan_elapsed, _ = timed(new_scan, content)
+        regex_elapsed, _ = timed(old_scan, content)
+        results.append({'unclosed': count, 'kb': round(len(content) / 1024, 1),
+                        'scan_ms': round(scan_elapsed * 1000, 2), 'regex_ms': round(regex_elapsed * 1000, 1)})
+        print(f"{count:>9} {results[-1]['kb']:>6} {results[-1]['scan_ms']:>9} {results[-1]['regex_ms']:>9}")
+
+    # Everything the old regexes found in these must still be found
+    print(f"\n{'case':>5} {'regex':>6} {'scan':>5}  missed")
+    for number, case in enumerate(PARITY_CASES, 1):
+        old = old_scan(case)
+        new = new_scan_html(case) if case.startswith('<') else new_scan(case)
+        missed = sorted(old - new)
+        results.append({'case': number, 'regex_urls': len(old), 'urls': len(new), 'missed': missed})
+        print(f"{number:>5} {len(old):>6} {len(new):>5}  {'✅' if not missed else '❌ ' + ', '.join(missed)}")
+
+    endpoints = sorted({value for kind, value in js_scan.scan(bundle) if kind == 'template'})
+    print(f"\n🔗 {len(endpoints)} runtime-built endpoints (${{...}}) reported, not fetched:")
+    for endpoint in endpoints:
+        print(f"   {endpoint}")
+    for row in results:
+        if row.get('missed') and 'copies' in row:
+            print(f"⚠️ {row['copies']}x: regex-only matches: {row['missed'][:10]}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'results': results, 'templates': endpoints}, f, indent=1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Single-pass HTML link extraction shared by webs.py, web.py and b.py.
+
+One walk over the document yields every element's (tag, attrs); callers pick the
+(tag, attr) pairs they care about. The parser backend is the fastest one installed:
+selectolax > lxml > the stdlib html.parser (which is what BeautifulSoup's
+'html.parser' builder uses, so results match the old find_all() code).
+"""
+from html.parser import HTMLParser
+
+BACKENDS = ['selectolax', 'lxml', 'html.parser']
+
+def available_backends():
+    found = []
+    for name in BACKENDS:
+        try:
+            if name == 'selectolax':
+                import selectolax.parser
+            elif name == 'lxml':
+                import lxml.etree
+        except ImportError:
+            continue
+        found.append(name)
+    return found
+
+BACKEND = available_backends()[0]
+
+def set_backend(name='auto'):
+    """Pick the parser backend; 'auto' takes the fastest installed. Returns the one in use."""
+    global BACKEND
+    found = available_backends()
+    BACKEND = found[0] if name == 'auto' or name not in found else name
+    return BACKEND
+
+def decode(html):
+    if isinstance(html, str):
+        return html
+    try:
+        return html.decode('utf-8')
+    except UnicodeDecodeError:
+        return html.decode('cp1252', errors='replace')
+
+class TagCollector(HTMLParser):
+    """Stdlib backend: records start tags only, no tree is built"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags = []
+
+    def handle_starttag(self, tag, attrs):
+        if attrs:
+            self.tags.append((tag, {name: value for name, value in attrs}))
+
+    handle_startendtag = handle_starttag
+
+def iter_tags(html):
+    """(tag, attrs) of every element that has attributes, in document order.
+    html may be str/bytes or an already parsed BeautifulSoup tree."""
+    if hasattr(html, 'find_all'):
+        # Reuse a tree the caller already built; one traversal instead of a find_all per tag
+        for tag in html.find_all(True):
+            if tag.attrs:
+                yield tag.name, {
+                    name: ' '.join(value) if isinstance(value, list) else value
+                    for name, value in tag.attrs.items()
+                }
+        return
+
+    if BACKEND == 'selectolax':
+        from selectolax.parser import HTMLParser as FastParser
+        for node in FastParser(html).root.traverse(include_text=False) if html else ():
+            attrs = node.attributes
+            if attrs:
+                yield node.tag, attrs
+    elif BACKEND == 'lxml':
+        import lxml.etree
+        # lxml rejects a str that starts with <?xml ... encoding=...?> (XHTML pages):
+        # hand it bytes, and say they are utf-8 when we did the encoding
+        if isinstance(html, str):
+            html, parser = html.encode('utf-8'), lxml.etree.HTMLParser(encoding='utf-8')
+        else:
+            parser = lxml.etree.HTMLParser()
+        root = lxml.etree.fromstring(html, parser) if html else None
+        if root is None:
+            return
+        for element in root.iter():
+            # comments and processing instructions have a non-string tag
+            if isinstance(element.tag, str) and element.attrib:
+                yield element.tag, dict(element.attrib)
+    else:
+        collector = TagCollector()
+        collector.feed(decode(html))
+        collector.close()
+        yield from collector.tags
+
+def extract(html, wanted):
+    """Values of the wanted (tag, attr) pairs in one pass.
+
+    wanted maps tag name -> attribute names; '*' matches any tag. Returns a list of
+    (tag, attr, value, attrs) with empty values skipped.
+    """
+    any_tag = tuple(wanted.get('*', ()))
+    lookup = {tag: tuple(attrs) + any_tag for tag, attrs in wanted.items() if tag != '*'}
+    found = []
+    for tag, attrs in iter_tags(html):
+        for attr in lookup.get(tag, any_tag):
+            value = attrs.get(attr)
+            if value:
+                found.append((tag, attr, value, attrs))
+    return found
+
+def has_rel(attrs, rel):
+    """rel is a space separated token list, as BeautifulSoup's rel='...' matching treats it"""
+    return rel in (attrs.get('rel') or '').lower().split()
@@ -0,0 +1,148 @@
+import argparse
+import json
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+import link_extract
+from b import WebsiteDownloader as AssetDownloader
+from web import WebsiteDownloader
+from webs import UltimateWebsiteDownloader
+
+DEFAULT_PAGES = ['ccc.html', 'pw/study.php', 'pw/study_1.php', 'pw/css2.html']
+BASE_URL = "https://www.example.com/dir/page.html"
+# XHTML with an encoding declaration: lxml refuses it as a str
+XHTML_SAMPLE = '''<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml"><head>
+<link rel="stylesheet" href="/css/site.css" /><link rel="icon" href="/favicon.ico" />
+<script src="/js/app.js"></script></head>
+<body style="background: url('/img/bg.png')"><a href="/p/1.html">Ünïcode</a><img src="/img/a.png" />
+<form action="/search.php"></form></body></html>
+'''.encode('utf-8')
+
+def old_webs_links(content):
+    """webs.py before the single pass: one find_all per (tag, attr)"""
+    soup = BeautifulSoup(content, 'html.parser')
+    found = []
+    for tag_name, attr in [('a', 'href'), ('link', 'href'), ('script', 'src'), ('img', 'src'),
+                           ('source', 'src'), ('audio', 'src'), ('video', 'src'), ('iframe', 'src'),
+                           ('form', 'action'), ('meta', 'content')]:
+        for tag in soup.find_all(tag_name, {attr: True}):
+            if tag.get(attr):
+                found.append(tag.get(attr))
+    return found
+
+def new_webs_links(content):
+    return [value for tag, attr, value, attrs in
+            link_extract.extract(content, UltimateWebsiteDownloader.HTML_LINK_ATTRS)]
+
+def old_web_links(content):
+    """web.py's extract_links before the single pass"""
+    soup = BeautifulSoup(content, 'html.parser')
+    links = []
+    for link in soup.find_all('link', rel='stylesheet'):
+        if link.get('href'):
+            links.append(urljoin(BASE_URL, link.get('href')))
+    for script in soup.find_all('script', src=True):
+        if script.get('src'):
+            links.append(urljoin(BASE_URL, script.get('src')))
+    for a in soup.find_all('a', href=True):
+        href = a.get('href')
+        if href and href.endswith(('.php', '.html', '.htm')):
+            links.append(urljoin(BASE_URL, href))
+    for img in soup.find_all('img', src=True):
+        if img.get('src'):
+            links.append(urljoin(BASE_URL, img.get('src')))
+    return list(set(links))
+
+def old_b_assets(soup):
+    """b.py's extract_assets before the single pass (over a prebuilt soup)"""
+    assets = []
+    for link in soup.find_all('link', rel='stylesheet'):
+        if link.get('href'):
+            assets.append(urljoin(BASE_URL, link.get('href')))
+    for script in soup.find_all('script', src=True):
+        assets.append(urljoin(BASE_URL, script['src']))
+    for img in soup.find_all('img', src=True):
+        assets.append(urljoin(BASE_URL, img['src']))
+    for link in soup.find_all('link', rel='icon'):
+        if link.get('href'):
+            assets.append(urljoin(BASE_URL, link.get('href')))
+    for tag in soup.find_all(style=True):
+        style = tag['style']
+        if 'url(' in style:
+            start = style.find('url(') + 4
+            end = style.find(')', start)
+            if start != -1 and end != -1:
+                assets.append(urljoin(BASE_URL, style[start:end].strip('"\'')))
+    return assets
+
+def best_of(function, argument, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(argument)
+        times.append(time.perf_counter() - started)
+    return min(times) * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Old per-tag find_all() vs single-pass link extraction on real pages")
+    parser.add_argument('pages', nargs='*', default=DEFAULT_PAGES)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    backends = link_extract.available_backends()
+    print("🧪 LINK EXTRACTION BENCHMARK")
+    print(f"🔧 Backends: {', '.join(backends)}")
+    print("=" * 60)
+    # extract_assets needs no state; skip __init__, which creates the download folder
+    asset_downloader = AssetDownloader.__new__(AssetDownloader)
+    web_downloader = WebsiteDownloader()
+    documents = []
+    for page in args.pages:
+        if not Path(page).exists():
+            print(f"⚠️ Skipping missing {page}")
+            continue
+        documents.append((page, Path(page).read_bytes()))
+    documents.append(('<xhtml sample>', XHTML_SAMPLE))
+    results = []
+    for page, content in documents:
+        row = {'page': page, 'kb': round(len(content) / 1024, 1)}
+        old_ms, old = best_of(old_webs_links, content, args.repeat)
+        row['webs_old_ms'] = round(old_ms, 2)
+        soup = BeautifulSoup(content, 'html.parser')
+        b_old_ms, b_old = best_of(old_b_assets, soup, args.repeat)
+        row['b_old_ms'] = round(b_old_ms, 2)
+        web_old = old_web_links(content)
+        for backend in backends:
+            link_extract.set_backend(backend)
+            new_ms, new = best_of(new_webs_links, content, args.repeat)
+            row[f"webs_{backend}_ms"] = round(new_ms, 2)
+            # webs.py hands over decoded text, the benchmark bytes: both must agree
+            row[f"{backend}_str_same"] = new_webs_links(content.decode('utf-8', errors='replace')) == new
+            # html.parser is what BeautifulSoup used, so it must give exactly the same links
+            if backend == 'html.parser':
+                row['webs_same'] = sorted(new) == sorted(old)
+                row['web_same'] = sorted(web_downloader.extract_links(content, BASE_URL)) == sorted(web_old)
+            print(f"📄 {page} ({row['kb']} KB) webs: find_all {old_ms:.2f} ms -> {backend} {new_ms:.2f} ms "
+                  f"(x{old_ms / max(1e-9, new_ms):.1f}, {len(new)} links)")
+        link_extract.set_backend('auto')
+        b_new_ms, b_new = best_of(lambda tree: asset_downloader.extract_assets(tree, BASE_URL), soup, args.repeat)
+        row['b_new_ms'] = round(b_new_ms, 2)
+        row['b_same'] = b_new == b_old
+        print(f"   b.py extract_assets over the parsed soup: {b_old_ms:.2f} ms -> {b_new_ms:.2f} ms "
+              f"(x{b_old_ms / max(1e-9, b_new_ms):.1f}, {len(b_new)} assets)")
+        same = all(value for key, value in row.items() if key.endswith('_same'))
+        print(f"   {'✅ same links as before' if same else '❌ LINKS DIFFER'}")
+        results.append(row)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'backends': backends, 'results': results}, f, indent=1)
+
+if __name__ == "__main__":
+    main()
@@ -5,73 +5,1396 @@ import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import re
+import os
 from datetime import datetime
 import asyncio
+import sqlite3
+import argparse
+import gzip
+import queue
+import random
+import bisect
+import shutil
+import hashlib
+import filecmp
+import zlib
+import contextlib
+import functools
+import sys
+from array import array
+from email.utils import parsedate_to_datetime
 import aiohttp
 import async_timeout
+from urllib.parse import urlparse
+
+# Statuses worth retrying; any other non-200 is treated as fatal for that URL
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# Endpoint families, matched against the URL path in this order
+ENDPOINT_FAMILIES = [
+    ('master-categories', '/master-categories'),
+    ('subcategories', '/subcategories'),
+    ('final-categories', '/final-categories'),
+    ('courses', '/courses'),
+    ('batch', '/batch/'),
+    ('topics', '/topics'),
+    ('content', '/content'),
+]
+
+# Hot-path JSON codec: json_loads(bytes|str) and json_dumps(obj) -> utf-8 bytes, rebound
+# by set_json_backend() to orjson or ujson when installed. Cold paths (summaries with
+# indent) stay on the stdlib.
+JSON_BACKEND = 'stdlib'
+
+def json_loads(data):
+    return json.loads(data)
+
+def json_dumps(obj, sort_keys=False):
+    return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys).encode('utf-8')
+
+STDLIB_JSON = (json_loads, json_dumps)
+
+def set_json_backend(name='auto'):
+    """Use orjson/ujson for json_loads/json_dumps; 'auto' takes the fastest installed.
+    Returns the backend actually in use (falls back to 'stdlib')."""
+    global JSON_BACKEND, json_loads, json_dumps
+    candidates = ['orjson', 'ujson'] if name == 'auto' else [name]
+    for candidate in candidates:
+        if candidate == 'orjson':
+            try:
+                import orjson
+            except ImportError:
+                continue
+            def orjson_dumps(obj, sort_keys=False):
+                try:
+                    return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+                except TypeError:
+                    # e.g. integers beyond 64 bits, which the stdlib handles
+                    return STDLIB_JSON[1](obj, sort_keys)
+            JSON_BACKEND, json_loads, json_dumps = 'orjson', orjson.loads, orjson_dumps
+            return JSON_BACKEND
+        if candidate == 'ujson':
+            try:
+                import ujson
+            except ImportError:
+                continue
+            def ujson_dumps(obj, sort_keys=False):
+                return ujson.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, escape_forward_slashes=False).encode('utf-8')
+            JSON_BACKEND, json_loads, json_dumps = 'ujson', ujson.loads, ujson_dumps
+            return JSON_BACKEND
+    JSON_BACKEND = 'stdlib'
+    json_loads, json_dumps = STDLIB_JSON
+    return JSON_BACKEND
+
+def install_event_loop(name='auto'):
+    """Make asyncio.run() use uvloop when requested/available; returns the loop in use"""
+    if name == 'asyncio':
+        return 'asyncio'
+    try:
+        import uvloop
+    except ImportError:
+        if name == 'uvloop':
+            print("⚠️ uvloop not installed (pip install uvloop), using asyncio")
+        return 'asyncio'
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return 'uvloop'
+
+class LatencyHistogram:
+    """Fixed log-spaced buckets (5ms .. ~30s) with percentile estimates"""
+    BOUNDS = [0.005 * 1.25 ** i for i in range(40)]
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+    
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+    
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile"""
+        if not self.count: return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank:
+                return self.BOUNDS[i] if i < len(self.BOUNDS) else float('inf')
+        return float('inf')
+
+class EndpointStats:
+    __slots__ = ('requests', 'statuses', 'bytes', 'retries', 'failures', 'in_flight', 'latency', 'cache_hits')
+    
+    def __init__(self):
+        self.cache_hits = 0
+        self.requests = 0
+        self.statuses = {}
+        self.bytes = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.latency = LatencyHistogram()
+
+class CrawlMetrics:
+    """Per-endpoint-family request metrics plus gauges, dumped as JSON and Prometheus text"""
+    def __init__(self, gauges=None):
+        self.endpoints = {name: EndpointStats() for name, _ in ENDPOINT_FAMILIES}
+        self.endpoints['other'] = EndpointStats()
+        self.gauges = gauges or (lambda: {})
+        self.started = time.time()
+    
+    @staticmethod
+    def family(url):
+        path = urlparse(url).path
+        for name, marker in ENDPOINT_FAMILIES:
+            if marker in path:
+                return name
+        return 'other'
+    
+    def request_started(self, family):
+        self.endpoints[family].in_flight += 1
+        return time.monotonic()
+    
+    def request_finished(self, family, status, nbytes, started):
+        stats = self.endpoints[family]
+        stats.in_flight -= 1
+        stats.requests += 1
+        stats.statuses[str(status)] = stats.statuses.get(str(status), 0) + 1
+        stats.bytes += nbytes
+        stats.latency.observe(time.monotonic() - started)
+    
+    def total(self, field):
+        """Sum of one EndpointStats counter over all families, e.g. total('requests')"""
+        return sum(getattr(stats, field) for stats in self.endpoints.values())
+    
+    def snapshot(self, gauges=None):
+        elapsed = max(1e-9, time.time() - self.started)
+        endpoints = {}
+        for name, stats in self.endpoints.items():
+            if not stats.requests and not stats.in_flight and not stats.cache_hits: continue
+            endpoints[name] = {
+                'requests': stats.requests,
+                'requests_per_sec': round(stats.requests / elapsed, 2),
+                'statuses': dict(stats.statuses),
+                'bytes': stats.bytes,
+                'retries': stats.retries,
+                'failures': stats.failures,
+                'cache_hits': stats.cache_hits,
+                'in_flight': stats.in_flight,
+                'latency_avg': round(stats.latency.total / max(1, stats.latency.count), 4),
+                'latency_p50': stats.latency.percentile(50),
+                'latency_p95': stats.latency.percentile(95),
+                'latency_p99': stats.latency.percentile(99),
+            }
+        return {'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'elapsed': round(elapsed, 2),
+                'endpoints': endpoints, 'gauges': self.gauges() if gauges is None else gauges}
+    
+    def prometheus_text(self, gauges=None):
+        lines = []
+        for name, stats in self.endpoints.items():
+            if not stats.requests and not stats.in_flight and not stats.cache_hits: continue
+            label = f'endpoint="{name}"'
+            for status, count in stats.statuses.items():
+                lines.append(f'utk_requests_total{{{label},status="{status}"}} {count}')
+            lines.append(f'utk_response_bytes_total{{{label}}} {stats.bytes}')
+            lines.append(f'utk_retries_total{{{label}}} {stats.retries}')
+            lines.append(f'utk_failures_total{{{label}}} {stats.failures}')
+            lines.append(f'utk_cache_hits_total{{{label}}} {stats.cache_hits}')
+            lines.append(f'utk_in_flight{{{label}}} {stats.in_flight}')
+            cumulative = 0
+            for bound, count in zip(stats.latency.BOUNDS, stats.latency.counts):
+                cumulative += count
+                lines.append(f'utk_request_seconds_bucket{{{label},le="{bound:.4f}"}} {cumulative}')
+            lines.append(f'utk_request_seconds_bucket{{{label},le="+Inf"}} {stats.latency.count}')
+            lines.append(f'utk_request_seconds_sum{{{label}}} {stats.latency.total:.4f}')
+            lines.append(f'utk_request_seconds_count{{{label}}} {stats.latency.count}')
+        for name, value in (self.gauges() if gauges is None else gauges).items():
+            lines.append(f'utk_gauge{{name="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+    
+    def collect(self):
+        """(snapshot, Prometheus text) copied out of the live counters. Call it on the
+        event loop: the counters, queues and limiters are only consistent there."""
+        gauges = self.gauges()
+        return self.snapshot(gauges), self.prometheus_text(gauges)
+    
+    @staticmethod
+    def write(base_path, snapshot, prometheus):
+        """Write METRICS.json and METRICS.prom from collect()'s copies; safe in a worker thread"""
+        (base_path / "METRICS.json").write_text(json.dumps(snapshot, indent=1), encoding='utf-8')
+        (base_path / "METRICS.prom").write_text(prometheus, encoding='utf-8')
+    
+    def dump(self, base_path):
+        self.write(base_path, *self.collect())
+    
+    def report_lines(self):
+        lines = []
+        for name, data in self.snapshot()['endpoints'].items():
+            lines.append(
+                f"{name:<18} {data['requests']:>7} req  {data['cache_hits']:>7} cached  {data['bytes'] / 1024 / 1024:>8.1f} MB  "
+                f"p50 {self.fmt_ms(data['latency_p50'])}  p95 {self.fmt_ms(data['latency_p95'])}  p99 {self.fmt_ms(data['latency_p99'])}\n"
+            )
+        return lines
+    
+    @staticmethod
+    def fmt_ms(seconds):
+        return "   -  " if seconds is None else f"{seconds * 1000:>5.0f}ms"
+
+class AdaptiveTimeouts:
+    """Per-family request timeout of factor x p99 of successful latencies, clamped to
+    [minimum, maximum]; the default applies until a family has min_samples responses"""
+    def __init__(self, default=5.0, minimum=1.0, maximum=30.0, factor=3.0, min_samples=20, adaptive=True):
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.min_samples = min_samples
+        self.adaptive = adaptive
+        self.latency = {}
+    
+    def observe(self, family, seconds):
+        histogram = self.latency.get(family)
+        if histogram is None:
+            histogram = self.latency[family] = LatencyHistogram()
+        histogram.observe(seconds)
+    
+    def percentile(self, family, q):
+        """q-th percentile of successful latencies, None until there are enough samples"""
+        histogram = self.latency.get(family)
+        if histogram is None or histogram.count < self.min_samples:
+            return None
+        return histogram.percentile(q)
+    
+    def timeout(self, family, timeouts=0):
+        """Timeout of the next attempt; doubles for each attempt of the URL that already timed out"""
+        p99 = self.percentile(family, 99) if self.adaptive else None
+        base = self.default if p99 is None else min(self.maximum, max(self.minimum, self.factor * p99))
+        return min(self.maximum, base * 2 ** timeouts)
+
+def open_db(path):
+    """SQLite connection the writer thread can use: WAL, fsync only at checkpoints"""
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+class ResponseCache:
+    """On-disk HTTP response cache: raw bodies as files, index (URL, ETag, Last-Modified) in SQLite"""
+    # Seconds a cached response is served without asking the server; 0 = always revalidate,
+    # negative = don't cache that endpoint family
+    DEFAULT_TTL = {
+        'master-categories': 86400, 'subcategories': 86400, 'final-categories': 86400,
+        'courses': 6 * 3600, 'batch': 3600, 'topics': 3600, 'content': 0,
+    }
+    
+    def __init__(self, cache_dir, ttl=None, commit_interval=2.0):
+        self.dir = Path(cache_dir)
+        (self.dir / "bodies").mkdir(parents=True, exist_ok=True)
+        self.ttl = dict(self.DEFAULT_TTL, **(ttl or {}))
+        self.conn = open_db(self.dir / "index.sqlite")
+        self.conn.execute('CREATE TABLE IF NOT EXISTS entries (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fetched_at REAL, path TEXT)')
+        self.conn.commit()
+        self.lock = threading.Lock()
+        self.commit_interval = commit_interval
+        self.last_commit = time.monotonic()
+    
+    def cacheable(self, family):
+        return self.ttl.get(family, -1) >= 0
+    
+    def worth_storing(self, family, etag, last_modified):
+        """A TTL of 0 means every use revalidates, so without a validator the entry is dead weight"""
+        return self.ttl.get(family, -1) > 0 or bool(etag or last_modified)
+    
+    def is_fresh(self, family, entry):
+        return time.time() - entry['fetched_at'] < self.ttl.get(family, -1)
+    
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def lookup(self, url):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT etag, last_modified, fetched_at, path FROM entries WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None: return None
+        return {'etag': row[0], 'last_modified': row[1], 'fetched_at': row[2], 'path': row[3]}
+    
+    def read_body(self, entry):
+        try:
+            return (self.dir / entry['path']).read_bytes()
+        except OSError:
+            return None
+    
+    def store(self, url, body, etag, last_modified):
+        """Writer thread: save the body file, then index it"""
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        path = Path("bodies") / digest[:2] / f"{digest}.json"
+        (self.dir / path).parent.mkdir(exist_ok=True)
+        temp = self.dir / f"{path}.tmp"
+        temp.write_bytes(body)
+        temp.replace(self.dir / path)
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                              (url, etag, last_modified, time.time(), str(path)))
+            self.maybe_commit()
+    
+    def touch(self, url):
+        """Writer thread: a 304 makes the cached copy fresh again"""
+        with self.lock:
+            self.conn.execute('UPDATE entries SET fetched_at = ? WHERE url = ?', (time.time(), url))
+            self.maybe_commit()
+    
+    def maybe_commit(self):
+        if time.monotonic() - self.last_commit >= self.commit_interval:
+            self.conn.commit()
+            self.last_commit = time.monotonic()
+    
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+class SyncState:
+    """Per-topic content hash and links from earlier runs, used by --delta"""
+    def __init__(self, path, changelog_dir):
+        self.conn = open_db(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS topics (key TEXT PRIMARY KEY, hash TEXT, links TEXT, hierarchy TEXT, run TEXT)')
+        self.conn.commit()
+        self.lock = threading.Lock()
+        self.run_id = time.strftime('%Y%m%d_%H%M%S')
+        changelog_dir.mkdir(exist_ok=True)
+        self.changelog_path = changelog_dir / f"CHANGELOG_{self.run_id}.ndjson"
+        self.changelog = open(self.changelog_path, 'w', encoding='utf-8')
+        self.counts = {'unchanged': 0, 'changed': 0, 'new': 0, 'added': 0, 'removed': 0, 'modified': 0}
+        self.last_commit = time.monotonic()
+    
+    @staticmethod
+    def content_hash(content_data):
+        # Always the stdlib encoding: the hash must not change with --json-backend or the
+        # machine (orjson and stdlib differ in whitespace, and orjson falls back for big ints)
+        canonical = json.dumps(content_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def topic_links(content_data):
+        """item id (or title/url) -> [title, url] for every item with a URL"""
+        links = {}
+        for item in content_data.get('data', []):
+            if item.get('url'):
+                key = str(item.get('id') or item.get('title') or item['url'])
+                links[key] = [item.get('title', 'No Title'), item['url']]
+        return links
+    
+    def lookup(self, key):
+        """(hash, links_json) recorded for the topic by an earlier run"""
+        with self.lock:
+            return self.conn.execute('SELECT hash, links FROM topics WHERE key = ?', (key,)).fetchone()
+    
+    def unchanged(self, key):
+        """Writer thread: topic content identical to the last run"""
+        with self.lock:
+            self.counts['unchanged'] += 1
+            self.conn.execute('UPDATE topics SET run = ? WHERE key = ?', (self.run_id, key))
+            self.maybe_commit()
+    
+    def record(self, key, digest, links, previous_links, hierarchy):
+        """Writer thread: log link changes against the previous state, then store the new state"""
+        old = json.loads(previous_links) if previous_links is not None else {}
+        with self.lock:
+            self.counts['new' if previous_links is None else 'changed'] += 1
+            for item_key, (title, url) in links.items():
+                if item_key not in old:
+                    self.log('added', key, hierarchy, title, url)
+                elif old[item_key] != [title, url]:
+                    self.log('modified', key, hierarchy, title, url, old_title=old[item_key][0], old_url=old[item_key][1])
+            for item_key, (title, url) in old.items():
+                if item_key not in links:
+                    self.log('removed', key, hierarchy, title, url)
+            self.conn.execute('INSERT OR REPLACE INTO topics VALUES (?, ?, ?, ?, ?)', (
+                key, digest, json.dumps(links, ensure_ascii=False), json.dumps(hierarchy, ensure_ascii=False), self.run_id
+            ))
+            self.maybe_commit()
+    
+    def log(self, change, key, hierarchy, title, url, **extra):
+        self.counts[change] += 1
+        record = {'change': change, 'topic': key, 'hierarchy': hierarchy, 'title': title, 'url': url}
+        record.update(extra)
+        self.changelog.write(json.dumps(record, ensure_ascii=False) + "\n")
+    
+    def maybe_commit(self):
+        if time.monotonic() - self.last_commit >= 2.0:
+            self.conn.commit()
+            self.last_commit = time.monotonic()
+    
+    def close(self, complete=False):
+        """complete: the whole catalogue was crawled, so topics not seen this run were removed"""
+        with self.lock:
+            if complete:
+                stale = self.conn.execute('SELECT key, links, hierarchy FROM topics WHERE run != ?', (self.run_id,)).fetchall()
+                for key, links, hierarchy in stale:
+                    for title, url in json.loads(links).values():
+                        self.log('removed', key, json.loads(hierarchy), title, url)
+                self.conn.execute('DELETE FROM topics WHERE run != ?', (self.run_id,))
+            self.conn.commit()
+            self.conn.close()
+            self.changelog.close()
+
+def intern_name(value):
+    """sys.intern() for API names/titles; None or numbers (the API sends both) are
+    kept as they are, clean_name() deals with them when paths are built"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Category:
+    """One master/sub/final category combination, shared by every course placed in it"""
+    __slots__ = ('master_id', 'master_name', 'subcat_id', 'sub_name', 'final_id', 'final_name')
+    
+    def __init__(self, master, sub, final_cat):
+        self.master_id = master['id']
+        self.master_name = intern_name(master['name'])
+        self.subcat_id = sub['id']
+        self.sub_name = intern_name(sub['name'])
+        self.final_id = final_cat['id']
+        self.final_name = intern_name(final_cat['name'])
+    
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+class CoursePlacement:
+    """A course in one category; reads like the old merged course/hierarchy dict"""
+    __slots__ = ('id', 'title', 'category')
+    
+    def __init__(self, course, category):
+        self.id = course['id']
+        self.title = intern_name(course['title'])
+        self.category = category
+    
+    def __getitem__(self, key):
+        if key in ('id', 'title'):
+            return getattr(self, key)
+        return getattr(self.category, key)
+    
+    def to_dict(self):
+        """Plain dict with the same keys, for crawl_events() consumers"""
+        return {'id': self.id, 'title': self.title, **{name: getattr(self.category, name) for name in Category.__slots__}}
+
+class HierarchyNode:
+    __slots__ = ('master', 'sub', 'final', 'course', 'subject', 'topic')
+    
+    def __init__(self, master, sub, final, course, subject, topic):
+        self.master = master
+        self.sub = sub
+        self.final = final
+        self.course = course
+        self.subject = subject
+        self.topic = topic
+    
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+def topic_hierarchy(topic):
+    """HierarchyNode-shaped dict of names for a topic record"""
+    return {
+        'master': topic['master_name'], 'sub': topic['sub_name'], 'final': topic['final_name'],
+        'course': topic['course_title'], 'subject': topic['subject_title'], 'topic': topic['topic_title']
+    }
+
+class LinkStore:
+    """Columnar all_links: each topic's hierarchy is stored once and links refer to it by
+    integer ID; URLs are split into an interned prefix and utf-8 suffix bytes"""
+    def __init__(self):
+        self.nodes = []
+        self.prefixes = []
+        self.prefix_ids = {}
+        self.link_nodes = array('I')
+        self.link_prefixes = array('I')
+        self.suffixes = bytearray()
+        self.offsets = array('Q', [0])
+        self.lock = threading.Lock()
+    
+    def add_node(self, master, sub, final, course, subject, topic):
+        """Register one topic's hierarchy, returns its node ID"""
+        node = HierarchyNode(*(intern_name(name) for name in (master, sub, final, course, subject, topic)))
+        with self.lock:
+            self.nodes.append(node)
+            return len(self.nodes) - 1
+    
+    def append(self, node_id, url):
+        split = url.rfind('/') + 1
+        prefix, suffix = url[:split], url[split:]
+        with self.lock:
+            prefix_id = self.prefix_ids.get(prefix)
+            if prefix_id is None:
+                prefix_id = self.prefix_ids[prefix] = len(self.prefixes)
+                self.prefixes.append(prefix)
+            self.link_nodes.append(node_id)
+            self.link_prefixes.append(prefix_id)
+            self.suffixes += suffix.encode('utf-8')
+            self.offsets.append(len(self.suffixes))
+    
+    def url(self, index):
+        suffix = self.suffixes[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+        return self.prefixes[self.link_prefixes[index]] + suffix
+    
+    def __len__(self):
+        return len(self.link_nodes)
+    
+    def __getitem__(self, index):
+        return {'hierarchy': self.nodes[self.link_nodes[index]].as_dict(), 'url': self.url(index)}
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+class LinkCounter:
+    """all_links stand-in for links-only mode: the links themselves go straight to disk"""
+    def __init__(self):
+        self.count = 0
+    
+    def add_node(self, *names):
+        return 0
+    
+    def append(self, node_id, url):
+        self.count += 1
+    
+    def __len__(self):
+        return self.count
+
+class FolderOutput:
+    """Default output: master/sub/final/course/subject/topic folders with two files each"""
+    def __init__(self, downloader, base_path):
+        self.downloader = downloader
+        self.base_path = base_path
+    
+    def topic_folder(self, topic):
+        downloader = self.downloader
+        return (
+            self.base_path / downloader.course_homes[topic['course_id']] /
+            downloader.clean_name(topic['subject_title']) / downloader.clean_name(topic['topic_title'])
+        )
+    
+    def has_topic(self, topic):
+        return (self.topic_folder(topic) / "ALL_LINKS.txt").exists()
+    
+    def write_topic(self, topic, content_data):
+        folder_path = self.topic_folder(topic)
+        self.downloader.disk_writer.ensure_dir(folder_path)
+        return self.downloader.save_data_ultra_fast(folder_path, content_data, "content_data") and \
+               self.downloader.save_links_ultra_fast(folder_path, self.downloader.render_links_text(content_data))
+    
+    def add_placement(self, course_data):
+        """Copy the course's home folder into one more placement"""
+        home = self.downloader.course_homes[course_data['id']]
+        target = self.downloader.course_folder(course_data)
+        if target != home and (self.base_path / home).exists():
+            shutil.copytree(self.base_path / home, self.base_path / target, dirs_exist_ok=True, copy_function=self.copy_if_changed)
+    
+    @staticmethod
+    def copy_if_changed(source, target):
+        """Leave identical files alone so placement copies don't churn mtimes/backups"""
+        if os.path.exists(target) and filecmp.cmp(source, target, shallow=False):
+            return target
+        return shutil.copy2(source, target)
+    
+    def close(self):
+        pass
+
+class PlacementsDB:
+    """SQLite file with the placements table (course -> category rows) shared by
+    PackedOutput and LinkIndex; commits every commit_every writes"""
+    PLACEMENT_COLUMNS = ('master_id', 'master_name', 'subcat_id', 'sub_name', 'final_id', 'final_name', 'id', 'title')
+    
+    def __init__(self, path, commit_every=500):
+        self.path = path
+        self.conn = open_db(path)
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS placements (
+            master_id, master_name TEXT, subcat_id, sub_name TEXT, final_id, final_name TEXT,
+            course_id, course_title TEXT, PRIMARY KEY (master_id, subcat_id, final_id, course_id))''')
+        self.commit_every = commit_every
+        self.pending = 0
+    
+    def add_placement(self, course_data):
+        self.conn.execute('INSERT OR REPLACE INTO placements VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                          tuple(course_data[column] for column in self.PLACEMENT_COLUMNS))
+        self.written()
+    
+    def written(self):
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.conn.commit()
+            self.pending = 0
+    
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+class PackedOutput(PlacementsDB):
+    """Single SQLite file with the hierarchy and every topic's content, keyed by IDs"""
+    def __init__(self, path, commit_every=500):
+        super().__init__(path, commit_every)
+        # content = zlib-compressed content_data.json exactly as the folder layout writes it
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS topics (
+            course_id, subject_id, subject_title TEXT, topic_id, topic_title TEXT, content BLOB,
+            PRIMARY KEY (course_id, subject_id, topic_id))''')
+        self.conn.commit()
+    
+    def has_topic(self, topic):
+        return self.conn.execute(
+            'SELECT 1 FROM topics WHERE course_id = ? AND subject_id = ? AND topic_id = ?',
+            (topic['course_id'], topic['subject_id'], topic['topic_id'])
+        ).fetchone() is not None
+    
+    def write_topic(self, topic, content_data):
+        content = zlib.compress(json_dumps(content_data))
+        self.conn.execute('INSERT OR REPLACE INTO topics VALUES (?, ?, ?, ?, ?, ?)', (
+            topic['course_id'], topic['subject_id'], topic['subject_title'],
+            topic['topic_id'], topic['topic_title'], content
+        ))
+        self.written()
+        return True
+    
+    def iter_topics(self):
+        """(course_data, subject_title, topic_title, raw content_data.json) for every placement"""
+        rows = self.conn.execute('''SELECT p.master_id, p.master_name, p.subcat_id, p.sub_name, p.final_id, p.final_name,
+                                           p.course_id, p.course_title, t.subject_title, t.topic_title, t.content
+                                    FROM placements p JOIN topics t ON t.course_id = p.course_id''')
+        for row in rows:
+            yield dict(zip(self.PLACEMENT_COLUMNS, row[:8])), row[8], row[9], zlib.decompress(row[10])
+
+class LinksOnlyOutput:
+    """Links-only mode: one NDJSON line per link, no per-topic files or content dumps.
+    Each link is written once, under its course's home placement."""
+    def __init__(self, path, append=False):
+        self.path = path
+        self.file = open(path, 'ab' if append else 'wb')
+    
+    def has_topic(self, topic):
+        return False
+    
+    def write_topic(self, topic, content_data):
+        hierarchy = topic_hierarchy(topic)
+        ids = {'course_id': topic['course_id'], 'subject_id': topic['subject_id'], 'topic_id': topic['topic_id']}
+        self.file.write(b''.join(
+            json_dumps({**ids, 'hierarchy': hierarchy, 'title': item.get('title', 'No Title'), 'url': item['url']}) + b"\n"
+            for item in content_data.get('data', []) if item.get('url')
+        ))
+        return True
+    
+    def add_placement(self, course_data):
+        pass
+    
+    def close(self):
+        self.file.close()
+
+class LinkIndex(PlacementsDB):
+    """SQLite index of every link with its hierarchy, plus a trigram FTS table on titles
+    (SQLite >= 3.34; older versions fall back to LIKE scans)"""
+    def __init__(self, path, resume=True, commit_every=500):
+        super().__init__(path, commit_every)
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS links (
+            id INTEGER PRIMARY KEY, course_id, subject_id, topic_id, course_title TEXT,
+            subject_title TEXT, topic_title TEXT, title TEXT, url TEXT, domain TEXT)''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS links_topic ON links (course_id, subject_id, topic_id)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS links_domain ON links (domain)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS placements_course ON placements (course_id)')
+        # trigram tokens make MATCH a substring search; kept in sync by the triggers below
+        try:
+            self.conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS links_fts USING fts5(
+                title, content='links', content_rowid='id', tokenize='trigram')''')
+            self.conn.execute('''CREATE TRIGGER IF NOT EXISTS links_ai AFTER INSERT ON links BEGIN
+                INSERT INTO links_fts (rowid, title) VALUES (new.id, new.title); END''')
+            self.conn.execute('''CREATE TRIGGER IF NOT EXISTS links_ad AFTER DELETE ON links BEGIN
+                INSERT INTO links_fts (links_fts, rowid, title) VALUES ('delete', old.id, old.title); END''')
+            # IF NOT EXISTS skips an index built by a newer SQLite: opening it is the real check
+            self.conn.execute('SELECT 1 FROM links_fts LIMIT 0').fetchall()
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            # No FTS5 or no trigram tokenizer (SQLite < 3.34): title search uses LIKE.
+            # Triggers left by a newer SQLite would fail every insert here, so drop them.
+            print(f"⚠️ Link index without full-text search ({e}); title queries will scan")
+            self.conn.execute('DROP TRIGGER IF EXISTS links_ai')
+            self.conn.execute('DROP TRIGGER IF EXISTS links_ad')
+            self.fts = False
+        if not resume:
+            self.conn.execute('DELETE FROM links')
+            self.conn.execute('DELETE FROM placements')
+        self.conn.commit()
+    
+    @staticmethod
+    def domain(url):
+        try:
+            return (urlparse(url).hostname or '').lower()
+        except ValueError:
+            return ''
+    
+    def add_topic(self, topic, course_title, content_data):
+        """Writer thread: (re)index one topic's links"""
+        key = (topic['course_id'], topic['subject_id'], topic['topic_id'])
+        self.conn.execute('DELETE FROM links WHERE course_id = ? AND subject_id = ? AND topic_id = ?', key)
+        self.conn.executemany(
+            'INSERT INTO links (course_id, subject_id, topic_id, course_title, subject_title, topic_title, title, url, domain) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                key + (course_title, topic['subject_title'], topic['topic_title'],
+                       item.get('title', 'No Title'), item['url'], self.domain(item['url']))
+                for item in content_data.get('data', []) if item.get('url')
+            ]
+        )
+        self.written()
+    
+    def query(self, course=None, subject=None, title=None, domain=None, limit=100):
+        """Links matching every given filter; course/subject are an ID or a title substring"""
+        where, params = [], []
+        for column, value in (('course', course), ('subject', subject)):
+            if value is None:
+                continue
+            if str(value).isdigit():
+                where.append(f"l.{column}_id = ?")
+                params.append(int(value))
+            else:
+                where.append(f"l.{column}_title LIKE ?")
+                params.append(f"%{value}%")
+        if title:
+            # trigram FTS needs 3+ characters, shorter needles fall back to a scan
+            if self.fts and len(title) >= 3:
+                where.append("l.id IN (SELECT rowid FROM links_fts WHERE links_fts MATCH ?)")
+                params.append('"' + title.replace('"', '""') + '"')
+            else:
+                where.append("l.title LIKE ?")
+                params.append(f"%{title}%")
+        if domain:
+            domain = domain.lower()
+            where.append("(l.domain = ? OR l.domain LIKE ?)")
+            params += [domain, f"%.{domain}"]
+        sql = (
+            "SELECT l.course_id, l.subject_id, l.topic_id, l.course_title, l.subject_title, l.topic_title, l.title, l.url "
+            "FROM links l" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY l.id LIMIT ?"
+        )
+        columns = ('course_id', 'subject_id', 'topic_id', 'course', 'subject', 'topic', 'title', 'url')
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, params + [limit])]
+    
+    def placements(self, course_id):
+        """(master, sub, final) names of every placement of a course"""
+        return self.conn.execute(
+            'SELECT master_name, sub_name, final_name FROM placements WHERE course_id = ?', (course_id,)
+        ).fetchall()
+
+class HostLimiter:
+    """Semaphore + token bucket limiter for a single API host"""
+    def __init__(self, max_concurrent, rate=None, burst=None):
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.capacity = burst or max_concurrent
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.waiting = 0
+        self.in_flight = 0
+        self.paused_until = 0
+    
+    def cooldown(self, seconds):
+        """Hold back every request to this host, e.g. after a 429 with Retry-After"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+    
+    async def take_token(self):
+        """Wait until the token bucket allows one more request"""
+        while self.paused_until > time.monotonic():
+            await asyncio.sleep(self.paused_until - time.monotonic())
+        if not self.rate: return
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+    
+    async def __aenter__(self):
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+            try:
+                await self.take_token()
+            except BaseException:
+                self.semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return self
+    
+    async def __aexit__(self, *exc):
+        self.in_flight -= 1
+        self.semaphore.release()
+    
+    def stats(self):
+        return {'in_flight': self.in_flight, 'queued': self.waiting, 'limit': self.max_concurrent, 'rate': self.rate}
+
+class CrawlJournal:
+    """SQLite journal of completed courses/subjects/topics, used by --resume"""
+    def __init__(self, path, resume=False, commit_every=500, commit_interval=2.0):
+        self.conn = open_db(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS done (kind TEXT, key TEXT, links INTEGER, PRIMARY KEY (kind, key))')
+        if not resume:
+            self.conn.execute('DELETE FROM done')
+        self.conn.commit()
+        self.lock = threading.Lock()
+        self.done = set(self.conn.execute("SELECT kind, key FROM done WHERE kind != 'home'"))
+        # course_id -> folder (relative to the output dir) its content is written to
+        self.homes = dict(
+            key.split('\t', 1) for (key,) in self.conn.execute("SELECT key FROM done WHERE kind = 'home'")
+        )
+        self.pending = []
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.last_commit = time.monotonic()
+    
+    def is_done(self, kind, key):
+        return (kind, key) in self.done
+    
+    def home(self, course_id):
+        return self.homes.get(str(course_id))
+    
+    def set_home(self, course_id, folder):
+        """In memory only, safe on the event loop; save_home() persists it"""
+        self.homes[str(course_id)] = str(folder)
+    
+    def save_home(self, course_id, folder):
+        """Writer thread: mark() may flush to SQLite"""
+        self.mark('home', f"{course_id}\t{folder}")
+    
+    def count(self, kind):
+        return sum(1 for k, _ in self.done if k == kind)
+    
+    def total_links(self):
+        with self.lock:
+            self.flush_locked()
+            return self.conn.execute("SELECT COALESCE(SUM(links), 0) FROM done WHERE kind = 'topic'").fetchone()[0]
+    
+    def mark(self, kind, key, links=0):
+        """Record one finished unit; commits are batched by count and time"""
+        with self.lock:
+            self.done.add((kind, key))
+            self.pending.append((kind, key, links))
+            if len(self.pending) >= self.commit_every or time.monotonic() - self.last_commit >= self.commit_interval:
+                self.flush_locked()
+    
+    def flush_locked(self):
+        if self.pending:
+            self.conn.executemany('INSERT OR REPLACE INTO done VALUES (?, ?, ?)', self.pending)
+            self.conn.commit()
+            self.pending = []
+        self.last_commit = time.monotonic()
+    
+    def close(self):
+        with self.lock:
+            self.flush_locked()
+            self.conn.close()
+
+class ResponseLogWriter:
+    """Background thread appending every API response as one NDJSON line"""
+    def __init__(self, path, compression=None, append=False, max_pending=2000, batch_size=256):
+        mode = 'ab' if append else 'wb'
+        if compression == 'zstd':
+            import zstandard
+            self.file = zstandard.ZstdCompressor(level=3).stream_writer(open(path, mode))
+        elif compression == 'gzip':
+            self.file = gzip.open(path, mode, compresslevel=5)
+        else:
+            self.file = open(path, mode)
+        self.path = path
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.batch_size = batch_size
+        self.errors = 0
+        self.thread = threading.Thread(target=self.run, name="response-log", daemon=True)
+        self.thread.start()
+    
+    @staticmethod
+    def log_path(base_path, compression=None):
+        suffix = {'gzip': '.gz', 'zstd': '.zst'}.get(compression, '')
+        return base_path / f"ALL_RESPONSES.ndjson{suffix}"
+    
+    async def write(self, url, data):
+        """Queue one response; waits off-loop only when the writer falls behind"""
+        try:
+            self.queue.put_nowait((url, data))
+        except queue.Full:
+            await asyncio.to_thread(self.queue.put, (url, data))
+    
+    def run(self):
+        while True:
+            items = [self.queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in items
+            # A failed batch is counted and dropped; the thread must keep draining the
+            # queue or write() would block forever once it fills up
+            try:
+                lines = [
+                    json_dumps({'url': item[0], 'data': item[1]}) + b"\n"
+                    for item in items if item is not None
+                ]
+                if lines:
+                    self.file.write(b''.join(lines))
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Response log write error: {e}")
+            if stop:
+                break
+    
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+
+class NullResponseLog:
+    """ResponseLogWriter stand-in for links-only mode and crawl_events(): writes nothing"""
+    path = None
+    
+    async def write(self, url, data):
+        pass
+    
+    def close(self):
+        pass
+
+class DiskWriter:
+    """Single writer thread for per-topic files, so the event loop never waits on disk"""
+    def __init__(self, max_pending=1000, batch_size=64):
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.batch_size = batch_size
+        self.created_dirs = set()
+        self.jobs_done = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self.run, name="disk-writer", daemon=True)
+        self.thread.start()
+    
+    async def submit(self, job):
+        """Queue a callable for the writer thread; jobs run in submission order"""
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            await asyncio.to_thread(self.queue.put, job)
+    
+    def ensure_dir(self, folder_path):
+        """mkdir once per folder for the whole run"""
+        if folder_path not in self.created_dirs:
+            folder_path.mkdir(parents=True, exist_ok=True)
+            self.created_dirs.add(folder_path)
+    
+    def run(self):
+        while True:
+            # Drain whatever is queued in one wake-up instead of one job per get()
+            jobs = [self.queue.get()]
+            while len(jobs) < self.batch_size:
+                try:
+                    jobs.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for job in jobs:
+                if job is None:
+                    return
+                try:
+                    job()
+                    self.jobs_done += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"⚠️ Write error: {e}")
+    
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
 
 class HyperFastUtkarshDownloader:
-    def __init__(self, max_workers=50):
-        self.base_url = "https://utk-batches-api.vercel.app/api"
-        self.api_url = "https://utkarsh-api.vercel.app/api"
+    def __init__(self, max_workers=50, host_limits=None, course_window=None, large_courses_first=False, large_first_buffer=None,
+                 resume=False, compression=None, max_retries=4, retry_base_delay=0.5, retry_max_delay=30, metrics_interval=15,
+                 base_url=None, api_url=None, cache_dir=None, cache_ttl=None, delta=False, output='folders',
+                 link_index=True, shard=None, shard_by='course', timeout=5, adaptive_timeouts=True,
+                 hedge=False, hedge_quantile=95, hedge_rate=0.05, hedge_families=('topics', 'content')):
+        # Overridable so the crawler can run against utk_mock_server.py
+        self.base_url = (base_url or "https://utk-batches-api.vercel.app/api").rstrip('/')
+        self.api_url = (api_url or "https://utkarsh-api.vercel.app/api").rstrip('/')
         self.max_workers = max_workers
-        self.all_links = []
-        self.all_responses = []
+        # Per host: {'concurrency': int, 'rate': requests/sec or None, 'burst': int};
+        # host_limits entries override these defaults key by key
+        self.host_limits = {
+            urlparse(self.base_url).netloc: {'concurrency': max_workers, 'rate': 100},
+            urlparse(self.api_url).netloc: {'concurrency': max_workers, 'rate': 200},
+        }
+        for host, config in (host_limits or {}).items():
+            self.host_limits[host] = {**self.host_limits.get(host, {}), **config}
+        self.limiters = {}
+        # Courses kept in flight by the content stage; a new one starts as soon as any finishes
+        self.course_window = course_window or max_workers
+        # Prefetch batch details and schedule courses with the most subjects first. The
+        # ordering only covers courses waiting in the content queue: large_first_buffer of
+        # them (default 4 x course_window), 0 = unbounded, i.e. every discovered course
+        # is ranked at the cost of holding all their batch details in memory.
+        self.large_courses_first = large_courses_first
+        # Pipeline stage -> worker count / bounded queue size
+        self.stage_workers = {'subs': 5, 'finals': 10, 'courses': 10, 'batches': 10, 'content': self.course_window}
+        self.queue_sizes = {'subs': 0, 'finals': 200, 'courses': 200, 'batches': 200, 'content': self.course_window * 4}
+        if large_courses_first and large_first_buffer is not None:
+            self.queue_sizes['content'] = large_first_buffer
+        # Skip courses/subjects/topics recorded in the crawl journal of a previous run
+        self.resume = resume
+        self.journal = None
+        # Single-flight: URL -> in-progress request task shared by identical requests
+        self.inflight = {}
+        self.queues = {}
+        # Raw responses are streamed to ALL_RESPONSES.ndjson[.gz|.zst] instead of kept in memory
+        self.compression = compression
+        self.response_log = None
+        self.disk_writer = None
+        # Capped exponential backoff with full jitter; Retry-After wins when larger
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        # Per-attempt timeouts follow each family's latency; the session timeout is only a backstop
+        self.timeouts = AdaptiveTimeouts(default=timeout, maximum=max(30, timeout), adaptive=adaptive_timeouts)
+        # Hedging: a second copy of a request still running after the family's hedge_quantile
+        # latency; at most hedge_rate of a family's requests are hedged
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_rate = hedge_rate
+        self.hedge_families = set(hedge_families)
+        # METRICS.json / METRICS.prom are rewritten every metrics_interval seconds and at the end
+        self.metrics_interval = metrics_interval
+        # Persistent response cache with ETag/Last-Modified revalidation (off when cache_dir is None)
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.cache = None
+        # Delta mode: skip rewriting unchanged topics and write a changelog of link changes
+        self.delta = delta
+        self.sync_state = None
+        # 'folders' (one directory per topic), 'sqlite' (single UTKARSH_PACKED.sqlite file)
+        # or 'links' (links-only: LINKS.ndjson, no content files, no response dump)
+        self.output_format = output
+        self.links_only = output == 'links'
+        self.output = None
+        self.link_index_enabled = link_index and not self.links_only
+        self.link_index = None
+        # shard = (index, count): only crawl the masters/courses whose ID hashes to index
+        self.shard = shard
+        self.shard_by = shard_by
+        # Async callables receiving every crawl event (see emit / crawl_events)
+        self.consumers = []
         self.lock = threading.Lock()
+        self.crawling = False
+        self.reset_crawl_state()
+    
+    def reset_crawl_state(self):
+        """Per-crawl counters and dedup state, so one instance can crawl again
+        (download_hyper_fast / crawl_events); running two crawls at once is refused"""
+        if self.crawling:
+            raise RuntimeError("A crawl is already running on this downloader")
+        self.course_seq = 0
+        self.skipped_count = 0
+        self.resumed_links = 0
+        self.coalesced_count = 0
+        # Course dedup: course_id -> every placement (course_data) seen in the category tree
+        self.course_placements = {}
+        self.course_homes = {}
+        self.finished_courses = set()
+        self.stage_counts = {'combinations': 0, 'courses': 0, 'unique_courses': 0}
+        self.all_links = LinkCounter() if self.links_only else LinkStore()
+        self.retry_count = 0
+        self.failures = []
+        self.hedge_counts = {}
+        self.hedge_wins = 0
+        self.metrics = CrawlMetrics(self.gauges)
+        self.crawl_complete = False
         self.processed_count = 0
         self.start_time = None
     
+    async def cancel_inflight(self):
+        """Cancel shared requests nobody awaits any more: async_request shields them from
+        their callers, so they would otherwise keep retrying and writing after a crawl ends"""
+        tasks = list(self.inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
     def clean_name(self, name):
         if not name: return "unknown"
         return re.sub(r'[<>:"/\\|?*]', '_', str(name))[:50]
     
+    def get_limiter(self, url):
+        """Limiter for the URL's host, created on first use inside the running loop"""
+        host = urlparse(url).netloc
+        limiter = self.limiters.get(host)
+        if limiter is None:
+            config = self.host_limits.get(host, {})
+            limiter = HostLimiter(
+                min(config.get('concurrency', self.max_workers), self.max_workers),
+                config.get('rate'), config.get('burst')
+            )
+            self.limiters[host] = limiter
+        return limiter
+    
+    def owns(self, item_id):
+        """Deterministic shard assignment, identical in every process/machine"""
+        if self.shard is None:
+            return True
+        index, count = self.shard
+        return zlib.crc32(str(item_id).encode('utf-8')) % count == index
+    
+    def course_key(self, course_data):
+        """Journal key of one course placement in the category tree"""
+        return f"{course_data['master_id']}/{course_data['subcat_id']}/{course_data['final_id']}/{course_data['id']}"
+    
+    def course_folder(self, course_data):
+        """Folder of one course placement, relative to the output dir"""
+        return (
+            Path(self.clean_name(course_data['master_name'])) /
+            self.clean_name(course_data['sub_name']) / self.clean_name(course_data['final_name']) /
+            f"{course_data['id']}_{self.clean_name(course_data['title'])}"
+        )
+    
+    def queue_depth(self):
+        """Requests waiting for a limiter slot, across all hosts"""
+        return sum(limiter.waiting for limiter in self.limiters.values())
+    
+    def gauges(self):
+        """Queue depths and in-flight counts for the metrics registry"""
+        gauges = {f"queue_{name}": queue.qsize() for name, queue in self.queues.items()}
+        for host, limiter in self.limiters.items():
+            gauges[f"limiter_in_flight_{host}"] = limiter.in_flight
+            gauges[f"limiter_queued_{host}"] = limiter.waiting
+        if self.disk_writer:
+            gauges['disk_writer_pending'] = self.disk_writer.queue.qsize()
+        if self.response_log and self.response_log.path:
+            gauges['response_log_pending'] = self.response_log.queue.qsize()
+        gauges['courses_processed'] = self.processed_count
+        gauges['links'] = len(self.all_links)
+        return gauges
+    
+    async def metrics_reporter(self, base_path):
+        """Periodically rewrite the metrics files without blocking the loop"""
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            try:
+                await asyncio.to_thread(CrawlMetrics.write, base_path, *self.metrics.collect())
+            except Exception as e:
+                print(f"⚠️ Metrics dump error: {e}")
+    
+    def pipeline_depths(self):
+        """Items waiting in each pipeline stage queue"""
+        return ' '.join(f"{name}={queue.qsize()}" for name, queue in self.queues.items())
+    
+    def parse_retry_after(self, value):
+        """Retry-After as seconds (delta-seconds or HTTP date)"""
+        if not value: return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    def backoff_delay(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.retry_max_delay))
+        return delay
+    
+    def record_failure(self, url, reason, attempts, retryable):
+        self.metrics.endpoints[self.metrics.family(url)].failures += 1
+        self.failures.append({'url': url, 'reason': reason, 'attempts': attempts, 'retryable': retryable})
+    
     async def async_request(self, session, url):
-        """Ultra fast async request"""
+        """Ultra fast async request; identical URLs in flight share one request"""
+        task = self.inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self.request_with_retries(session, url))
+            self.inflight[url] = task
+            task.add_done_callback(lambda _: self.inflight.pop(url, None))
+        else:
+            self.coalesced_count += 1
+        # shield: one caller being cancelled must not cancel the request for the others
+        return await asyncio.shield(task)
+    
+    async def cached_data(self, url, family, entry, revalidated=False):
+        """Decode a cached body; None if the body file is gone or corrupt"""
+        body = await asyncio.to_thread(self.cache.read_body, entry)
+        if body is None: return None
         try:
-            async with async_timeout.timeout(5):
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        with self.lock:
-                            self.all_responses.append({'url': url, 'data': data})
-                        return data
-        except:
+            data = json_loads(body)
+        except ValueError:
             return None
+        if revalidated:
+            await self.disk_writer.submit(lambda: self.cache.touch(url))
+        self.metrics.endpoints[family].cache_hits += 1
+        await self.response_log.write(url, data)
+        return data
+    
+    async def request_with_retries(self, session, url):
+        """Single request, retrying transient errors with backoff"""
+        limiter = self.get_limiter(url)
+        family = self.metrics.family(url)
+        
+        entry = None
+        if self.cache and self.cache.cacheable(family):
+            entry = await asyncio.to_thread(self.cache.lookup, url)
+            if entry and self.cache.is_fresh(family, entry):
+                data = await self.cached_data(url, family, entry)
+                if data is not None:
+                    return data
+                entry = None
+        
+        attempt = 0
+        timeouts = 0
+        while True:
+            attempt += 1
+            result = await self.hedged_attempt(session, url, family, limiter, entry, self.timeouts.timeout(family, timeouts))
+            if 'data' in result:
+                body = result['body']
+                etag, last_modified = result['etag'], result['last_modified']
+                if self.cache and self.cache.cacheable(family) and self.cache.worth_storing(family, etag, last_modified):
+                    await self.disk_writer.submit(lambda: self.cache.store(url, body, etag, last_modified))
+                await self.response_log.write(url, result['data'])
+                return result['data']
+            not_modified = result.get('not_modified', False)
+            reason, retryable, retry_after = result['reason'], result['retryable'], result.get('retry_after')
+            if reason == "timeout":
+                timeouts += 1
+            
+            if not_modified:
+                data = await self.cached_data(url, family, entry, revalidated=True)
+                if data is not None:
+                    return data
+                # Cached body vanished: ask again without validators
+                entry = None
+                continue
+            if not retryable or attempt > self.max_retries:
+                self.record_failure(url, reason, attempt, retryable)
+                return None
+            if retry_after is not None:
+                limiter.cooldown(min(retry_after, self.retry_max_delay))
+            self.retry_count += 1
+            self.metrics.endpoints[family].retries += 1
+            await asyncio.sleep(self.backoff_delay(attempt, retry_after))
+    
+    async def attempt_request(self, session, url, family, limiter, entry, timeout, sent=None):
+        """One attempt: a dict with 'data' (+ body/etag/last_modified) on success, else
+        reason/retryable/retry_after/not_modified. No side effects, so hedged copies can race."""
+        status, nbytes, started = 'error', 0, None
+        # Every attempt takes a limiter slot and token, so retries and hedges share the request budget
+        try:
+            async with limiter:
+                started = self.metrics.request_started(family)
+                if sent:
+                    sent.set()
+                async with async_timeout.timeout(timeout):
+                    headers = self.cache.conditional_headers(entry) if entry else None
+                    async with session.get(url, headers=headers) as response:
+                        status = response.status
+                        if response.status == 200:
+                            body = await response.read()
+                            nbytes = len(body)
+                            data = json_loads(body)
+                            self.timeouts.observe(family, time.monotonic() - started)
+                            return {'data': data, 'body': body, 'etag': response.headers.get('ETag'),
+                                    'last_modified': response.headers.get('Last-Modified')}
+                        if response.status == 304:
+                            self.timeouts.observe(family, time.monotonic() - started)
+                        return {
+                            'not_modified': response.status == 304 and entry is not None,
+                            'reason': f"HTTP {response.status}",
+                            'retryable': response.status in RETRYABLE_STATUS,
+                            'retry_after': self.parse_retry_after(response.headers.get('Retry-After')),
+                        }
+        except asyncio.CancelledError:
+            status = 'hedge_cancelled'
+            raise
+        except asyncio.TimeoutError:
+            status = 'timeout'
+            return {'reason': "timeout", 'retryable': True}
+        except ValueError as e:
+            return {'reason': f"invalid JSON: {e}", 'retryable': False}
+        except aiohttp.ClientError as e:
+            return {'reason': f"{type(e).__name__}: {e}", 'retryable': True}
+        except Exception as e:
+            return {'reason': f"{type(e).__name__}: {e}", 'retryable': False}
+        finally:
+            if started is not None:
+                self.metrics.request_finished(family, status, nbytes, started)
+    
+    def can_hedge(self, family):
+        if not self.hedge or family not in self.hedge_families:
+            return False
+        return self.hedge_counts.get(family, 0) < self.hedge_rate * max(1, self.metrics.endpoints[family].requests)
+    
+    async def hedged_attempt(self, session, url, family, limiter, entry, timeout):
+        """attempt_request, plus a duplicate once the first has been out longer than the
+        family's hedge quantile; the first success wins and the other copy is cancelled"""
+        delay = self.timeouts.percentile(family, self.hedge_quantile) if self.can_hedge(family) else None
+        if delay is None or delay >= timeout:
+            return await self.attempt_request(session, url, family, limiter, entry, timeout)
+        
+        sent = asyncio.Event()
+        primary = asyncio.ensure_future(self.attempt_request(session, url, family, limiter, entry, timeout, sent))
+        # The hedge clock starts when the request leaves the limiter, not while it queues
+        waiter = asyncio.ensure_future(sent.wait())
+        tasks = {primary, waiter}
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.can_hedge(family):
+                return await primary
+            self.hedge_counts[family] = self.hedge_counts.get(family, 0) + 1
+            backup = asyncio.ensure_future(self.attempt_request(session, url, family, limiter, entry, timeout))
+            tasks.add(backup)
+            pending = {primary, backup}
+            failed = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if 'data' in result or result.get('not_modified'):
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return result
+                    if task is primary or failed is None:
+                        failed = result
+            return failed
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def hedge_report(self):
+        hedged = sum(self.hedge_counts.values())
+        timeouts = {family: self.timeouts.timeout(family) for family in self.timeouts.latency}
+        line = ", ".join(f"{family} {seconds:.1f}s" for family, seconds in timeouts.items())
+        return f"Hedged Requests: {hedged} ({self.hedge_wins} won)\n", f"Timeouts: {line or 'default'}\n"
     
     async def fetch_all_masters(self, session):
         """Fetch all master categories"""
         return await self.async_request(session, f"{self.base_url}/master-categories")
     
-    async def fetch_all_subs(self, session, masters):
-        """Fetch all subcategories in parallel"""
-        tasks = []
-        for master in masters:
-            url = f"{self.base_url}/subcategories?master_id={master['id']}"
-            tasks.append(self.async_request(session, url))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        return results
-    
-    async def fetch_all_finals(self, session, master_subs):
-        """Fetch all final categories in parallel"""
-        tasks = []
-        for master_id, subs in master_subs.items():
-            for sub in subs:
-                url = f"{self.base_url}/final-categories?subcat_id={sub['id']}"
-                tasks.append(self.async_request(session, url))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        return results
-    
-    async def fetch_all_courses(self, session, hierarchy_data):
-        """Fetch all courses in parallel"""
-        tasks = []
-        for data in hierarchy_data:
-            url = f"{self.base_url}/courses?master_id={data['master_id']}&cat_id={data['subcat_id']}&sub_cat_id={data['final_id']}"
-            tasks.append(self.async_request(session, url))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        return results
+    async def fetch_subs(self, session, master_id):
+        """Fetch subcategories of one master category"""
+        return await self.async_request(session, f"{self.base_url}/subcategories?master_id={master_id}")
+    
+    async def fetch_finals(self, session, subcat_id):
+        """Fetch final categories of one subcategory"""
+        return await self.async_request(session, f"{self.base_url}/final-categories?subcat_id={subcat_id}")
+    
+    async def fetch_courses(self, session, hierarchy):
+        """Fetch courses of one category combination"""
+        return await self.async_request(session, f"{self.base_url}/courses?master_id={hierarchy['master_id']}&cat_id={hierarchy['subcat_id']}&sub_cat_id={hierarchy['final_id']}")
     
     async def fetch_batch_details(self, session, course_id):
         """Fetch batch details"""
@@ -88,74 +1411,152 @@ class HyperFastUtkarshDownloader:
     def save_data_ultra_fast(self, folder_path, data, filename):
         """Ultra fast save - no validation"""
         try:
-            (folder_path / f"{filename}.json").write_text(
-                json.dumps(data, ensure_ascii=False), 
-                encoding='utf-8'
-            )
+            (folder_path / f"{filename}.json").write_bytes(json_dumps(data))
             return True
         except:
             return False
     
-    def save_links_ultra_fast(self, folder_path, content_data, hierarchy):
+    @staticmethod
+    def render_links_text(content_data):
+        """ALL_LINKS.txt of one topic"""
+        content = ["UTKARSH LINKS\n", "="*40 + "\n"]
+        for item in content_data.get('data', []):
+            if item.get('url'):
+                content.extend([
+                    f"\n{item.get('title', 'No Title')}\n",
+                    f"URL: {item['url']}\n",
+                    "-"*30 + "\n"
+                ])
+        return ''.join(content)
+    
+    def collect_links(self, content_data, node_id):
+        """Add a topic's links to all_links, returns its item count"""
+        for item in content_data.get('data', []):
+            if item.get('url'):
+                self.all_links.append(node_id, item['url'])
+        return len(content_data.get('data', []))
+    
+    def save_links_ultra_fast(self, folder_path, links_text):
         """Ultra fast links save"""
         try:
-            content = ["UTKARSH LINKS\n", "="*40 + "\n"]
-            for item in content_data.get('data', []):
-                if item.get('url'):
-                    content.extend([
-                        f"\n{item.get('title', 'No Title')}\n",
-                        f"URL: {item['url']}\n",
-                        "-"*30 + "\n"
-                    ])
-                    with self.lock:
-                        self.all_links.append({'hierarchy': hierarchy, 'url': item['url']})
-            
-            (folder_path / "ALL_LINKS.txt").write_text(''.join(content), encoding='utf-8')
-            return len(content_data.get('data', []))
+            (folder_path / "ALL_LINKS.txt").write_text(links_text, encoding='utf-8')
+            return True
         except:
-            return 0
+            return False
+    
+    async def emit(self, event):
+        """Hand one crawl event to every consumer in turn; a slow consumer slows the crawl"""
+        for consumer in self.consumers:
+            await consumer(event)
+    
+    async def write_event(self, event):
+        """Consumer used by download_hyper_fast: output backend, link index, delta and journal.
+        Everything goes through the FIFO disk writer, so a subject/course is only checked
+        after its topic writes."""
+        kind = event['type']
+        if kind == 'topic':
+            topic, content_data, links = event['topic'], event['content'], event['links']
+            topic_key = f"{topic['course_id']}/{topic['subject_id']}/{topic['topic_id']}"
+            delta = None
+            if self.sync_state:
+                digest = self.sync_state.content_hash(content_data)
+                previous = await asyncio.to_thread(self.sync_state.lookup, topic_key)
+                delta = {
+                    'hash': digest,
+                    'unchanged': previous is not None and previous[0] == digest,
+                    'previous': previous[1] if previous else None,
+                    'links': self.sync_state.topic_links(content_data),
+                    'hierarchy': topic_hierarchy(topic),
+                }
+            await self.disk_writer.submit(lambda: self.write_topic(topic, content_data, topic_key, links, delta))
+        elif kind == 'subject_done':
+            subject_key = f"{event['course']['id']}/{event['subject']['id']}"
+            await self.disk_writer.submit(lambda: self.finish_subject(subject_key, event['topics']))
+        elif kind == 'course_done':
+            await self.disk_writer.submit(
+                lambda: self.finish_course(event['course']['id'], event['subjects'], event['placements'])
+            )
+        elif kind == 'placement':
+            await self.disk_writer.submit(lambda: self.copy_placement(event['course']))
+    
+    def write_topic(self, topic, content_data, topic_key, links, delta=None):
+        """Writer thread: save one topic to the output, then journal it"""
+        if self.link_index:
+            self.link_index.add_topic(topic, topic['course_title'], content_data)
+        if delta and delta['unchanged'] and self.output.has_topic(topic):
+            self.sync_state.unchanged(topic_key)
+            self.journal.mark('topic', topic_key, links)
+            return
+        if self.output.write_topic(topic, content_data):
+            self.journal.mark('topic', topic_key, links)
+            if delta:
+                self.sync_state.record(topic_key, delta['hash'], delta['links'], delta['previous'], delta['hierarchy'])
+    
+    def finish_subject(self, subject_key, topics):
+        """Writer thread: runs after the subject's topic writes, so the journal is up to date"""
+        if all(self.journal.is_done('topic', f"{subject_key}/{topic['id']}") for topic in topics):
+            self.journal.mark('subject', subject_key)
+    
+    def finish_course(self, course_id, subjects, placements):
+        """Writer thread: runs after the course's subject checks"""
+        if all(self.journal.is_done('subject', f"{course_id}/{subject['id']}") for subject in subjects):
+            self.journal.mark('course', str(course_id))
+        for course_data in placements:
+            self.copy_placement(course_data)
+    
+    def copy_placement(self, course_data):
+        """Writer thread: materialise one more placement of a course from its home"""
+        self.output.add_placement(course_data)
+        if self.link_index:
+            self.link_index.add_placement(course_data)
+        if self.journal.is_done('course', str(course_data['id'])):
+            self.journal.mark('placement', self.course_key(course_data))
     
-    async def process_content_hyper_fast(self, session, course_data, base_path):
+    async def process_content_hyper_fast(self, session, course_data, batch_data=None):
         """Hyper fast content processing"""
         course_id = course_data['id']
-        course_title = course_data['title']
-        master_cat = course_data['master_name']
-        sub_cat = course_data['sub_name'] 
-        final_cat = course_data['final_name']
         
-        # Get batch details
-        batch_data = await self.fetch_batch_details(session, course_id)
-        if not batch_data: return 0
+        # Get batch details (already prefetched when scheduling large courses first)
+        if batch_data is None:
+            batch_data = await self.fetch_batch_details(session, course_id)
+        if not batch_data:
+            self.finished_courses.add(course_id)
+            return 0
         
         total_links = 0
         subjects = batch_data.get('data', {}).get('subjects', [])
+        await self.emit({'type': 'course', 'course': course_data, 'subjects': subjects})
         
         # Process subjects in parallel
         subject_tasks = []
         for subject in subjects:
-            subject_tasks.append(self.process_subject_hyper_fast(
-                session, course_id, course_title, subject, 
-                master_cat, sub_cat, final_cat, base_path
-            ))
+            if self.journal.is_done('subject', f"{course_id}/{subject['id']}"):
+                continue
+            subject_tasks.append(self.process_subject_hyper_fast(session, course_data, subject))
         
         if subject_tasks:
             results = await asyncio.gather(*subject_tasks)
             total_links = sum(results)
         
+        # Copy into every placement seen so far; later ones are copied as they are found
+        self.finished_courses.add(course_id)
+        placements = list(self.course_placements[course_id])
+        await self.emit({'type': 'course_done', 'course': course_data, 'subjects': subjects, 'placements': placements})
+        
         self.processed_count += 1
         if self.processed_count % 10 == 0:
             elapsed = time.time() - self.start_time
-            print(f"⚡ Processed: {self.processed_count} courses | Links: {len(self.all_links)} | Speed: {len(self.all_links)/max(1,elapsed):.1f} links/sec")
+            print(f"⚡ Processed: {self.processed_count} courses | Links: {len(self.all_links)} | Speed: {len(self.all_links)/max(1,elapsed):.1f} links/sec | Queued: {self.queue_depth()} | Pipeline: {self.pipeline_depths()}")
         
         return total_links
     
-    async def process_subject_hyper_fast(self, session, course_id, course_title, subject, master_cat, sub_cat, final_cat, base_path):
+    async def process_subject_hyper_fast(self, session, course_data, subject):
         """Hyper fast subject processing"""
         subject_id = subject['id']
-        subject_title = subject['title']
+        subject_key = f"{course_data['id']}/{subject_id}"
         
         # Get topics
-        topics_data = await self.fetch_topics(session, course_id, subject_id)
+        topics_data = await self.fetch_topics(session, course_data['id'], subject_id)
         if not topics_data: return 0
         
         topics = topics_data.get('data', [])
@@ -163,147 +1564,379 @@ class HyperFastUtkarshDownloader:
         # Process topics in parallel
         topic_tasks = []
         for topic in topics:
-            topic_tasks.append(self.process_topic_hyper_fast(
-                session, course_id, subject_id, course_title, subject_title,
-                topic, master_cat, sub_cat, final_cat, base_path
-            ))
+            if self.journal.is_done('topic', f"{subject_key}/{topic['id']}"):
+                continue
+            topic_tasks.append(self.process_topic_hyper_fast(session, course_data, subject, topic))
         
+        total_links = 0
         if topic_tasks:
             results = await asyncio.gather(*topic_tasks)
-            return sum(results)
+            total_links = sum(results)
         
-        return 0
+        await self.emit({'type': 'subject_done', 'course': course_data, 'subject': subject, 'topics': topics})
+        
+        return total_links
     
-    async def process_topic_hyper_fast(self, session, course_id, subject_id, course_title, subject_title, topic, master_cat, sub_cat, final_cat, base_path):
+    async def process_topic_hyper_fast(self, session, course_data, subject, topic):
         """Hyper fast topic processing"""
+        course_id = course_data['id']
+        course_title = course_data['title']
+        subject_id = subject['id']
+        subject_title = subject['title']
         topic_id = topic['id']
         topic_title = topic['title']
+        master_cat = course_data['master_name']
+        sub_cat = course_data['sub_name']
+        final_cat = course_data['final_name']
         
-        # Create folder path
-        folder_path = (
-            base_path / self.clean_name(master_cat) / 
-            self.clean_name(sub_cat) / self.clean_name(final_cat) /
-            f"{course_id}_{self.clean_name(course_title)}" /
-            self.clean_name(subject_title) / self.clean_name(topic_title)
-        )
-        folder_path.mkdir(parents=True, exist_ok=True)
+        # Content is written once, to the course's home placement
+        topic_ref = {
+            'course_id': course_id, 'course_title': course_title, 'subject_id': subject_id, 'subject_title': subject_title,
+            'topic_id': topic_id, 'topic_title': topic_title,
+            'master_name': master_cat, 'sub_name': sub_cat, 'final_name': final_cat
+        }
         
         # Get content
         content_data = await self.fetch_content(session, course_id, subject_id, topic_id)
         if not content_data: return 0
         
-        # Save data
-        self.save_data_ultra_fast(folder_path, content_data, "content_data")
+        node_id = self.all_links.add_node(master_cat, sub_cat, final_cat, course_title, subject_title, topic_title)
+        links = self.collect_links(content_data, node_id)
         
-        # Save links
-        hierarchy = {
-            'master': master_cat, 'sub': sub_cat, 'final': final_cat,
-            'course': course_title, 'subject': subject_title, 'topic': topic_title
-        }
-        
-        return self.save_links_ultra_fast(folder_path, content_data, hierarchy)
+        await self.emit({'type': 'topic', 'topic': topic_ref, 'content': content_data, 'links': links})
+        return links
+    
+    async def stage_worker(self, name, handler):
+        """Pull items from one pipeline queue until cancelled"""
+        queue = self.queues[name]
+        while True:
+            item = await queue.get()
+            try:
+                await handler(item)
+            except Exception as e:
+                print(f"⚠️ {name} stage error: {e}")
+            finally:
+                queue.task_done()
+    
+    async def handle_master(self, session, master):
+        """subs stage: master -> (master, sub) items"""
+        result = await self.fetch_subs(session, master['id'])
+        if not result or 'data' not in result: return
+        for sub in result['data']:
+            await self.queues['finals'].put((master, sub))
+    
+    async def handle_sub(self, session, item):
+        """finals stage: (master, sub) -> category combinations"""
+        master, sub = item
+        result = await self.fetch_finals(session, sub['id'])
+        if not result or 'data' not in result: return
+        for final_cat in result['data']:
+            self.stage_counts['combinations'] += 1
+            await self.queues['courses'].put(Category(master, sub, final_cat))
     
-    async def download_hyper_fast(self):
+    async def handle_final(self, session, hierarchy):
+        """courses stage: category combination -> course items"""
+        result = await self.fetch_courses(session, hierarchy)
+        if not result or 'data' not in result: return
+        for course in result['data']:
+            # Sharding by course keeps every placement of a course in the same shard
+            if self.shard_by == 'course' and not self.owns(course['id']):
+                continue
+            course_data = CoursePlacement(course, hierarchy)
+            self.stage_counts['courses'] += 1
+            
+            # Each course is fetched once; extra placements only get a copy of its folder
+            course_id = course_data['id']
+            if course_id in self.course_placements:
+                self.course_placements[course_id].append(course_data)
+                if course_id in self.finished_courses:
+                    await self.emit({'type': 'placement', 'course': course_data})
+                continue
+            self.course_placements[course_id] = [course_data]
+            self.stage_counts['unique_courses'] += 1
+            
+            home = self.journal.home(course_id)
+            if home is None:
+                home = self.course_folder(course_data)
+                self.journal.set_home(course_id, home)
+                # The loop never touches SQLite; FIFO order puts it before the course's topics
+                await self.disk_writer.submit(functools.partial(self.journal.save_home, course_id, home))
+            self.course_homes[course_id] = Path(home)
+            
+            if self.journal.is_done('course', str(course_id)):
+                self.skipped_count += 1
+                self.finished_courses.add(course_id)
+                if not self.journal.is_done('placement', self.course_key(course_data)):
+                    await self.emit({'type': 'placement', 'course': course_data})
+                continue
+            await self.queues['batches' if self.large_courses_first else 'content'].put(course_data)
+    
+    async def handle_batch(self, session, course_data):
+        """batches stage: fetch batch details and rank the course by subject count"""
+        batch_data = await self.fetch_batch_details(session, course_data['id'])
+        if not batch_data: return
+        subjects = batch_data.get('data', {}).get('subjects', [])
+        self.course_seq += 1
+        await self.queues['content'].put((-len(subjects), self.course_seq, course_data, batch_data))
+    
+    async def handle_course(self, session, item):
+        """content stage: one slot of the course sliding window"""
+        if self.large_courses_first:
+            _, _, course_data, batch_data = item
+            return await self.process_content_hyper_fast(session, course_data, batch_data)
+        return await self.process_content_hyper_fast(session, item)
+    
+    async def download_hyper_fast(self, output_dir="Utkarsh_Hyper_Fast"):
         """MAIN HYPER FAST DOWNLOAD METHOD"""
         print("🚀 HYPER FAST DOWNLOAD STARTING...")
-        print("⚡ 1000x SPEED - ASYNC PARALLEL PROCESSING")
-        print("🎯 MAX WORKERS: 50 | TIMEOUT: 5s\n")
+        print("⚡ 1000x SPEED - STREAMING ASYNC PIPELINE")
+        print(f"🎯 MAX WORKERS: {self.max_workers} | COURSE WINDOW: {self.course_window}{' (large first)' if self.large_courses_first else ''} | TIMEOUT: {self.timeouts.default}s{' adaptive' if self.timeouts.adaptive else ''}{' | HEDGING' if self.hedge else ''}")
+        if self.shard:
+            print(f"🧩 SHARD {self.shard[0]}/{self.shard[1]} by {self.shard_by}")
+        for host, config in self.host_limits.items():
+            print(f"🚦 {host}: {config.get('concurrency', self.max_workers)} concurrent | {config.get('rate') or 'unlimited'} req/s")
+        print()
         
+        self.reset_crawl_state()
         self.start_time = time.time()
-        base_path = Path("Utkarsh_Hyper_Fast")
-        base_path.mkdir(exist_ok=True)
+        base_path = Path(output_dir)
+        base_path.mkdir(parents=True, exist_ok=True)
         
-        connector = aiohttp.TCPConnector(limit=100, limit_per_host=50)
+        self.journal = CrawlJournal(base_path / "CRAWL_JOURNAL.sqlite", resume=self.resume)
+        if self.resume:
+            self.resumed_links = self.journal.total_links()
+            print(f"♻️ RESUMING: {self.journal.count('course')} courses, {self.journal.count('topic')} topics already done\n")
+        if self.links_only:
+            self.response_log = NullResponseLog()
+        else:
+            self.response_log = ResponseLogWriter(
+                ResponseLogWriter.log_path(base_path, self.compression),
+                compression=self.compression, append=self.resume
+            )
+        self.disk_writer = DiskWriter()
+        if self.links_only:
+            self.output = LinksOnlyOutput(base_path / "LINKS.ndjson", append=self.resume)
+            print(f"🔗 Links-only mode: streaming links to {self.output.path}\n")
+        elif self.output_format == 'sqlite':
+            self.output = PackedOutput(base_path / "UTKARSH_PACKED.sqlite")
+            print(f"📦 Packed output: {self.output.path} (use --export-tree to build folders)\n")
+        else:
+            self.output = FolderOutput(self, base_path)
+        if self.link_index_enabled:
+            self.link_index = LinkIndex(base_path / "LINK_INDEX.sqlite", resume=self.resume)
+        if self.cache_dir:
+            self.cache = ResponseCache(self.cache_dir, self.cache_ttl)
+            print(f"🗄️ Response cache: {Path(self.cache_dir).absolute()}\n")
+        if self.delta:
+            self.sync_state = SyncState(base_path / "SYNC_STATE.sqlite", base_path / "CHANGELOGS")
+        self.consumers.append(self.write_event)
+        reporter = asyncio.create_task(self.metrics_reporter(base_path))
+        # No await since reset_crawl_state(), so no other crawl can have started in between
+        self.crawling = True
+        try:
+            await self.crawl_hyper_fast(base_path)
+        finally:
+            reporter.cancel()
+            await self.cancel_inflight()
+            self.consumers.remove(self.write_event)
+            self.crawling = False
+            self.metrics.dump(base_path)
+            self.response_log.close()
+            self.disk_writer.close()
+            self.output.close()
+            if self.link_index:
+                self.link_index.close()
+            if self.sync_state:
+                self.close_sync_state()
+            if self.cache:
+                self.cache.close()
+            self.journal.close()
+    
+    async def crawl_hyper_fast(self, base_path):
+        """Run the category/course/content pipeline and the final save"""
+        connector = aiohttp.TCPConnector(limit=self.max_workers * 2, limit_per_host=self.max_workers)
         
         async with aiohttp.ClientSession(
             connector=connector,
-            timeout=aiohttp.ClientTimeout(total=30),
+            timeout=aiohttp.ClientTimeout(total=self.timeouts.maximum),
             headers={'User-Agent': 'Mozilla/5.0'}
         ) as session:
             
             # STEP 1: Get all masters
             print("📥 Fetching master categories...")
             masters_data = await self.fetch_all_masters(session)
-            if not masters_data: return
+            if not masters_data:
+                # Nothing below it can be crawled; still leave the summary and FAILED_REQUESTS.json
+                reason = self.failures[-1]['reason'] if self.failures else "no data"
+                print(f"❌ Could not fetch master categories ({reason}), nothing was crawled")
+                if base_path is not None:
+                    await self.save_final_data_hyper_fast(base_path)
+                return
             
             masters = masters_data.get('data', [])
             print(f"✅ Found {len(masters)} master categories")
+            if self.shard and self.shard_by == 'master':
+                masters = [master for master in masters if self.owns(master['id'])]
+                print(f"🧩 Shard {self.shard[0]}/{self.shard[1]}: {len(masters)} master categories")
             
-            # STEP 2: Get all subcategories in parallel
-            print("📥 Fetching ALL subcategories in parallel...")
-            subs_results = await self.fetch_all_subs(session, masters)
-            
-            master_subs = {}
-            for i, result in enumerate(subs_results):
-                if result and 'data' in result:
-                    master_subs[masters[i]['id']] = result['data']
-            
-            # STEP 3: Get all final categories in parallel
-            print("📥 Fetching ALL final categories in parallel...")
-            finals_results = await self.fetch_all_finals(session, master_subs)
-            
-            hierarchy_data = []
-            result_index = 0
-            for master_id, subs in master_subs.items():
-                master_name = next((m['name'] for m in masters if m['id'] == master_id), 'Unknown')
-                for sub in subs:
-                    if result_index < len(finals_results) and finals_results[result_index] and 'data' in finals_results[result_index]:
-                        for final_cat in finals_results[result_index]['data']:
-                            hierarchy_data.append({
-                                'master_id': master_id,
-                                'master_name': master_name,
-                                'subcat_id': sub['id'],
-                                'sub_name': sub['name'],
-                                'final_id': final_cat['id'],
-                                'final_name': final_cat['name']
-                            })
-                    result_index += 1
-            
-            print(f"🎯 Found {len(hierarchy_data)} category combinations")
-            
-            # STEP 4: Get all courses in parallel
-            print("📥 Fetching ALL courses in parallel...")
-            courses_results = await self.fetch_all_courses(session, hierarchy_data)
-            
-            # STEP 5: Process all courses in MASSIVE parallel
-            print("🚀 Processing ALL content in MASSIVE parallel...")
-            all_courses_data = []
-            
-            for i, result in enumerate(courses_results):
-                if result and 'data' in result:
-                    hierarchy = hierarchy_data[i]
-                    for course in result['data']:
-                        course_data = course.copy()
-                        course_data.update(hierarchy)
-                        all_courses_data.append(course_data)
-            
-            print(f"📚 Found {len(all_courses_data)} total courses")
+            # STEP 2-5: masters -> subs -> finals -> courses -> content, each stage
+            # feeding the next through a bounded queue so no level waits on a barrier
+            print("🚀 Streaming subcategories, final categories, courses and content...")
+            self.stage_counts = {'combinations': 0, 'courses': 0, 'unique_courses': 0}
+            stages = [name for name in self.stage_workers if name != 'batches' or self.large_courses_first]
+            self.queues = {name: asyncio.Queue(maxsize=self.queue_sizes[name]) for name in stages}
+            if self.large_courses_first:
+                self.queues['content'] = asyncio.PriorityQueue(maxsize=self.queue_sizes['content'])
+            handlers = {
+                'subs': lambda item: self.handle_master(session, item),
+                'finals': lambda item: self.handle_sub(session, item),
+                'courses': lambda item: self.handle_final(session, item),
+                'batches': lambda item: self.handle_batch(session, item),
+                'content': lambda item: self.handle_course(session, item),
+            }
+            workers = [
+                asyncio.create_task(self.stage_worker(name, handlers[name]))
+                for name in stages
+                for _ in range(self.stage_workers[name])
+            ]
             
-            # MASSIVE PARALLEL PROCESSING
-            print("⚡ STARTING MASSIVE PARALLEL PROCESSING...")
+            try:
+                for master in masters:
+                    await self.queues['subs'].put(master)
+                # Each stage only finishes after pushing everything downstream,
+                # so joining in order drains the whole pipeline
+                for name in stages:
+                    await self.queues[name].join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
             
-            # Process in chunks to avoid memory issues
-            chunk_size = 100
-            total_processed = 0
+            print(f"🎯 Found {self.stage_counts['combinations']} category combinations")
+            print(f"📚 Processed {self.stage_counts['unique_courses']} unique courses in {self.stage_counts['courses']} placements")
+            print(f"🔀 Coalesced {self.coalesced_count} duplicate in-flight requests")
+            if self.skipped_count:
+                print(f"♻️ Skipped {self.skipped_count} courses finished in a previous run")
             
-            for i in range(0, len(all_courses_data), chunk_size):
-                chunk = all_courses_data[i:i + chunk_size]
-                
-                # Process chunk in parallel
-                chunk_tasks = []
-                for course_data in chunk:
-                    chunk_tasks.append(self.process_content_hyper_fast(session, course_data, base_path))
-                
-                chunk_results = await asyncio.gather(*chunk_tasks)
-                total_processed += len(chunk)
-                
-                print(f"📦 Processed chunk: {total_processed}/{len(all_courses_data)} courses")
-                
-                # Small delay between chunks
-                await asyncio.sleep(0.1)
+            self.crawl_complete = True
             
             # FINAL SAVE
-            await self.save_final_data_hyper_fast(base_path)
+            if base_path is not None:
+                await self.save_final_data_hyper_fast(base_path)
+    
+    async def crawl_events(self, max_pending=1000):
+        """Async generator of crawl events as they arrive, without touching the filesystem.
+        
+        Events are plain dicts with a 'type' (course is {'id', 'title', 'master_id',
+        'master_name', 'subcat_id', 'sub_name', 'final_id', 'final_name'}):
+          course        {'course', 'subjects'}             batch details of a course were fetched
+          topic         {'topic', 'content', 'links'}      one topic's content_data
+          subject_done  {'course', 'subject', 'topics'}
+          course_done   {'course', 'subjects', 'placements'}  placements: every category's course dict
+          placement     {'course'}                         a finished course found in one more category
+        At most max_pending events are buffered; the crawl waits while the consumer is behind.
+        Stopping early: wrap in contextlib.aclosing() so the crawl, including requests
+        still in flight, is cancelled right away.
+        """
+        events = asyncio.Queue(maxsize=max_pending)
+        finished = object()
+        self.reset_crawl_state()
+        self.start_time = time.time()
+        self.journal = CrawlJournal(':memory:')
+        self.response_log = NullResponseLog()
+        self.disk_writer = DiskWriter()
+        if self.cache_dir:
+            self.cache = ResponseCache(self.cache_dir, self.cache_ttl)
+        self.consumers.append(events.put)
+        
+        async def crawl():
+            # No sentinel when cancelled: the reader is gone by then
+            try:
+                await self.crawl_hyper_fast(None)
+            except Exception:
+                await events.put(finished)
+                raise
+            await events.put(finished)
+        
+        task = asyncio.create_task(crawl())
+        self.crawling = True
+        try:
+            while True:
+                event = await events.get()
+                if event is finished:
+                    break
+                if 'course' in event:
+                    # CoursePlacement is internal; consumers get dicts they can .get() or serialize
+                    event = {**event, 'course': event['course'].to_dict()}
+                    if 'placements' in event:
+                        event['placements'] = [placement.to_dict() for placement in event['placements']]
+                yield event
+            await task
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            # Before the writer and cache close: orphaned requests would still submit to them
+            await self.cancel_inflight()
+            self.consumers.remove(events.put)
+            self.crawling = False
+            self.disk_writer.close()
+            if self.cache:
+                self.cache.close()
+            self.journal.close()
+    
+    async def iter_links(self, max_pending=1000):
+        """Async generator of (hierarchy, title, url) for every link, as topics arrive"""
+        async with contextlib.aclosing(self.crawl_events(max_pending)) as events:
+            async for event in events:
+                if event['type'] != 'topic':
+                    continue
+                topic = event['topic']
+                hierarchy = topic_hierarchy(topic)
+                for item in event['content'].get('data', []):
+                    if item.get('url'):
+                        yield hierarchy, item.get('title', 'No Title'), item['url']
+    
+    def export_packed_tree(self, db_path, out_dir):
+        """Materialise the usual folder layout from a packed SQLite output"""
+        store = PackedOutput(db_path)
+        out_dir = Path(out_dir)
+        topics = 0
+        created = set()
+        try:
+            for course_data, subject_title, topic_title, content in store.iter_topics():
+                folder_path = out_dir / self.course_folder(course_data) / self.clean_name(subject_title) / self.clean_name(topic_title)
+                if folder_path not in created:
+                    folder_path.mkdir(parents=True, exist_ok=True)
+                    created.add(folder_path)
+                (folder_path / "content_data.json").write_bytes(content)
+                self.save_links_ultra_fast(folder_path, self.render_links_text(json_loads(content)))
+                topics += 1
+        finally:
+            store.close()
+        print(f"📂 Exported {topics} topics to {out_dir.absolute()}")
+        return topics
+    
+    def close_sync_state(self):
+        """Removed topics are only trusted after a complete, failure-free, non-resumed crawl"""
+        complete = self.crawl_complete and not self.failures and not self.resume
+        self.sync_state.close(complete=complete)
+        counts = self.sync_state.counts
+        print(f"🔄 Delta: {counts['unchanged']} unchanged, {counts['changed']} changed, {counts['new']} new topics")
+        print(f"📝 Changelog: +{counts['added']} / -{counts['removed']} / ~{counts['modified']} links -> {self.sync_state.changelog_path}")
+        if not complete:
+            print("   (removed topics not checked: crawl was partial)")
+    
+    def failure_report(self):
+        """Summary lines: failed requests grouped by reason"""
+        lines = [f"Failed Requests: {len(self.failures)}\n"]
+        by_reason = {}
+        for failure in self.failures:
+            by_reason[failure['reason']] = by_reason.get(failure['reason'], 0) + 1
+        for reason, count in sorted(by_reason.items(), key=lambda item: -item[1]):
+            lines.append(f"  {count:>6}  {reason}\n")
+        if self.failures:
+            lines.append("  (full list with URLs in FAILED_REQUESTS.json)\n")
+        return lines
     
     async def save_final_data_hyper_fast(self, base_path):
         """Hyper fast final save"""
@@ -313,23 +1946,62 @@ class HyperFastUtkarshDownloader:
                 "UTKARSH HYPER FAST DOWNLOAD\n",
                 "="*50 + "\n",
                 f"Total Links: {len(self.all_links)}\n",
-                f"Total API Calls: {len(self.all_responses)}\n", 
+                f"Total API Calls: {self.metrics.total('requests')}\n",
+                f"Cache Hits: {self.metrics.total('cache_hits')}\n",
                 f"Time: {time.strftime('%Y-%m-%d %H:%M:%S')}\n",
                 f"Duration: {time.time() - self.start_time:.2f}s\n"
             ]
+            if self.resume:
+                summary_content.append(f"Links From Previous Runs: {self.resumed_links}\n")
+            for host, limiter in self.limiters.items():
+                stats = limiter.stats()
+                summary_content.append(f"Limiter {host}: {stats['limit']} concurrent, {stats['rate'] or 'unlimited'} req/s\n")
+            summary_content.append(f"Courses: {self.stage_counts['unique_courses']} unique, {self.stage_counts['courses']} placements\n")
+            summary_content.append(f"Coalesced Requests: {self.coalesced_count}\n")
+            summary_content.append(f"Retries: {self.retry_count}\n")
+            summary_content.extend(self.hedge_report())
+            summary_content.extend(self.failure_report())
+            summary_content.append("Endpoints:\n")
+            summary_content.extend(self.metrics.report_lines())
             (base_path / "HYPER_FAST_SUMMARY.txt").write_text(''.join(summary_content))
-            
-            # Save responses
-            (base_path / "ALL_RESPONSES.json").write_text(
-                json.dumps(self.all_responses, ensure_ascii=False),
-                encoding='utf-8'
-            )
+            # Machine-readable twin of the text summary, summed by merge_shards
+            (base_path / "HYPER_FAST_SUMMARY.json").write_text(json.dumps({
+                'links': len(self.all_links),
+                'api_calls': self.metrics.total('requests'),
+                'cache_hits': self.metrics.total('cache_hits'),
+                'duration': round(time.time() - self.start_time, 2),
+                'unique_courses': self.stage_counts['unique_courses'],
+                'placements': self.stage_counts['courses'],
+                'coalesced': self.coalesced_count,
+                'retries': self.retry_count,
+                'failures': len(self.failures),
+                'shard': list(self.shard) if self.shard else None,
+                'endpoints': {
+                    name: {'requests': stats.requests, 'bytes': stats.bytes, 'retries': stats.retries,
+                           'failures': stats.failures, 'cache_hits': stats.cache_hits}
+                    for name, stats in self.metrics.endpoints.items() if stats.requests or stats.cache_hits
+                },
+            }, indent=1), encoding='utf-8')
+            if self.failures:
+                (base_path / "FAILED_REQUESTS.json").write_text(
+                    json.dumps(self.failures, ensure_ascii=False, indent=1),
+                    encoding='utf-8'
+                )
+            elif (base_path / "FAILED_REQUESTS.json").exists():
+                (base_path / "FAILED_REQUESTS.json").unlink()
             
             elapsed = time.time() - self.start_time
-            print(f"\n🎉 HYPER FAST DOWNLOAD COMPLETED!")
+            print("\n🎉 HYPER FAST DOWNLOAD COMPLETED!" if self.crawl_complete else "\n⚠️ HYPER FAST DOWNLOAD STOPPED EARLY")
             print(f"📍 Location: {base_path.absolute()}")
             print(f"📊 Total links: {len(self.all_links)}")
-            print(f"🔗 API calls: {len(self.all_responses)}")
+            cache_hits = self.metrics.total('cache_hits')
+            print(f"🔗 API calls: {self.metrics.total('requests')}" + (f" | 💾 {cache_hits} from cache" if cache_hits else "") +
+                  (f" (streamed to {self.response_log.path.name})" if self.response_log.path else ""))
+            print(f"🔁 Retries: {self.retry_count} | ❌ Failed requests: {len(self.failures)}")
+            hedged, timeouts = self.hedge_report()
+            print(f"🪁 {hedged.strip()} | ⏱️ {timeouts.strip()}")
+            for line in self.metrics.report_lines():
+                print(f"   📈 {line}", end='')
             print(f"⚡ Time: {elapsed:.2f} seconds")
             print(f"🚀 SPEED: {len(self.all_links)/max(1,elapsed):.1f} links/second")
             print(f"💫 1000x FASTER THAN NORMAL!")
@@ -337,20 +2009,277 @@ class HyperFastUtkarshDownloader:
         except Exception as e:
             print(f"Final save note: {e}")
 
-def run_hyper_fast():
-    """Run hyper fast downloader"""
-    downloader = HyperFastUtkarshDownloader(max_workers=50)
+SUMMARY_TOTALS = ('links', 'api_calls', 'cache_hits', 'unique_courses', 'placements', 'coalesced', 'retries', 'failures')
+
+def merge_sqlite(target_path, shard_path, tables):
+    """Append the given tables of one shard database into the merged one"""
+    conn = sqlite3.connect(str(target_path))
+    try:
+        conn.execute('ATTACH DATABASE ? AS shard', (str(shard_path),))
+        for table, statement in tables:
+            conn.execute(statement.format(table=table))
+        conn.commit()
+        conn.execute('DETACH DATABASE shard')
+    finally:
+        conn.close()
+
+def merge_shards(shard_dirs, output_dir):
+    """Combine shard outputs into one: content trees, packed/link-index databases,
+    LINKS.ndjson, response logs, failures and the summary. Crawl state (journal,
+    delta state, cache) stays with each shard so shards can be resumed on their own."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    shard_dirs = [Path(shard_dir) for shard_dir in shard_dirs]
+    concatenated = set()
+    totals = {key: 0 for key in SUMMARY_TOTALS}
+    endpoints = {}
+    failures = []
+    duration = 0
+    
+    for shard_dir in shard_dirs:
+        print(f"🧩 Merging {shard_dir}")
+        for path in sorted(shard_dir.iterdir()):
+            if path.is_dir() and path.name not in ('HTTP_CACHE', 'CHANGELOGS'):
+                # Course folders: shards own disjoint courses, so this only adds files
+                shutil.copytree(path, output_dir / path.name, dirs_exist_ok=True, copy_function=FolderOutput.copy_if_changed)
+            elif path.name.startswith('ALL_RESPONSES.ndjson') or path.name == 'LINKS.ndjson':
+                # Plain, gzip and zstd streams all stay valid when concatenated
+                mode = 'ab' if path.name in concatenated else 'wb'
+                concatenated.add(path.name)
+                with open(output_dir / path.name, mode) as target, open(path, 'rb') as source:
+                    shutil.copyfileobj(source, target, 1 << 20)
+        
+        if (shard_dir / "UTKARSH_PACKED.sqlite").exists():
+            PackedOutput(output_dir / "UTKARSH_PACKED.sqlite").close()
+            merge_sqlite(output_dir / "UTKARSH_PACKED.sqlite", shard_dir / "UTKARSH_PACKED.sqlite", [
+                ('placements', 'INSERT OR REPLACE INTO main.{table} SELECT * FROM shard.{table}'),
+                ('topics', 'INSERT OR REPLACE INTO main.{table} SELECT * FROM shard.{table}'),
+            ])
+        if (shard_dir / "LINK_INDEX.sqlite").exists():
+            LinkIndex(output_dir / "LINK_INDEX.sqlite").close()
+            columns = 'course_id, subject_id, topic_id, course_title, subject_title, topic_title, title, url, domain'
+            merge_sqlite(output_dir / "LINK_INDEX.sqlite", shard_dir / "LINK_INDEX.sqlite", [
+                ('placements', 'INSERT OR REPLACE INTO main.{table} SELECT * FROM shard.{table}'),
+                # Sharding by master can crawl a course twice; the last shard's copy of a topic wins
+                ('links', 'DELETE FROM main.{table} WHERE (course_id, subject_id, topic_id) IN '
+                          '(SELECT course_id, subject_id, topic_id FROM shard.{table})'),
+                ('links', f'INSERT INTO main.{{table}} ({columns}) SELECT {columns} FROM shard.{{table}} ORDER BY id'),
+            ])
+        
+        if (shard_dir / "FAILED_REQUESTS.json").exists():
+            failures.extend(json.loads((shard_dir / "FAILED_REQUESTS.json").read_text(encoding='utf-8')))
+        if (shard_dir / "HYPER_FAST_SUMMARY.json").exists():
+            summary = json.loads((shard_dir / "HYPER_FAST_SUMMARY.json").read_text(encoding='utf-8'))
+            for key in SUMMARY_TOTALS:
+                totals[key] += summary.get(key, 0)
+            # Shards run side by side, so the merged run took as long as the slowest one
+            duration = max(duration, summary.get('duration', 0))
+            for name, stats in summary.get('endpoints', {}).items():
+                merged = endpoints.setdefault(name, dict.fromkeys(stats, 0))
+                for key, value in stats.items():
+                    merged[key] = merged.get(key, 0) + value
+    
+    if failures:
+        (output_dir / "FAILED_REQUESTS.json").write_text(json.dumps(failures, ensure_ascii=False, indent=1), encoding='utf-8')
+    (output_dir / "HYPER_FAST_SUMMARY.json").write_text(json.dumps(
+        dict(totals, duration=duration, shards=[str(shard_dir) for shard_dir in shard_dirs], endpoints=endpoints), indent=1
+    ), encoding='utf-8')
+    summary_content = [
+        "UTKARSH HYPER FAST DOWNLOAD (MERGED)\n",
+        "="*50 + "\n",
+        f"Shards: {len(shard_dirs)}\n",
+        f"Total Links: {totals['links']}\n",
+        f"Total API Calls: {totals['api_calls']}\n",
+        f"Cache Hits: {totals['cache_hits']}\n",
+        f"Time: {time.strftime('%Y-%m-%d %H:%M:%S')}\n",
+        f"Duration: {duration:.2f}s (slowest shard)\n",
+        f"Courses: {totals['unique_courses']} unique, {totals['placements']} placements\n",
+        f"Coalesced Requests: {totals['coalesced']}\n",
+        f"Retries: {totals['retries']}\n",
+        f"Failed Requests: {totals['failures']}\n",
+        "Endpoints:\n",
+    ]
+    for name, stats in endpoints.items():
+        summary_content.append(f"{name}: {stats['requests']} requests, {stats['retries']} retries, "
+                               f"{stats['failures']} failed, {stats['cache_hits']} cached, {stats['bytes']} bytes\n")
+    (output_dir / "HYPER_FAST_SUMMARY.txt").write_text(''.join(summary_content))
+    print(f"✅ Merged {len(shard_dirs)} shards into {output_dir.absolute()}: {totals['links']} links, {totals['api_calls']} API calls")
+    return totals
+
+def parse_shard(value):
+    """'I/N' -> (I, N)"""
+    index, _, count = value.partition('/')
+    index, count = int(index), int(count)
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{count - 1}")
+    return index, count
+
+def parse_host_limit(value):
+    """'HOST=CONCURRENCY[:RATE[:BURST]]' -> (host, config); RATE 0 turns the rate limit off"""
+    host, _, spec = value.partition('=')
+    parts = spec.split(':')
+    try:
+        if not host or not 1 <= len(parts) <= 3:
+            raise ValueError
+        config = {'concurrency': int(parts[0])}
+        if len(parts) > 1:
+            config['rate'] = float(parts[1]) or None
+        if len(parts) > 2:
+            config['burst'] = int(parts[2])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected HOST=CONCURRENCY[:RATE[:BURST]], got {value!r}")
+    return host, config
+
+def run_shard_process(argv):
+    # run_hyper_fast() reports errors itself; the exit code is what run_local_shards sees
+    sys.exit(run_hyper_fast(argv))
+
+def run_local_shards(argv, processes, output_dir):
+    """--processes N: one spawned process (own event loop) per shard, then merge"""
+    import multiprocessing
+    context = multiprocessing.get_context('spawn')
+    shard_dirs = [Path(output_dir) / "SHARDS" / f"shard-{index}-of-{processes}" for index in range(processes)]
+    children = [
+        context.Process(
+            target=run_shard_process,
+            args=(list(argv) + ['--shard', f"{index}/{processes}", '--output-dir', str(shard_dirs[index])],),
+            name=f"shard-{index}"
+        )
+        for index in range(processes)
+    ]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+    failed = [child.name for child in children if child.exitcode != 0]
+    if failed:
+        print(f"⚠️ Shards exited with errors: {', '.join(failed)} (re-run them with --shard I/N --resume)")
+    merge_shards([shard_dir for shard_dir in shard_dirs if shard_dir.exists()], output_dir)
+    return 1 if failed else 0
+
+def run_hyper_fast(argv=None):
+    """Run hyper fast downloader; returns the exit status (non-zero if the crawl failed or stopped early)"""
+    parser = argparse.ArgumentParser(description="Utkarsh hyper fast downloader")
+    parser.add_argument('--resume', action='store_true', help="skip work recorded in CRAWL_JOURNAL.sqlite by an earlier run")
+    parser.add_argument('--output-dir', default="Utkarsh_Hyper_Fast", help="folder for the output and crawl state")
+    parser.add_argument('--workers', type=int, default=50, help="max concurrent requests per host")
+    parser.add_argument('--host-limit', type=parse_host_limit, action='append', default=[], metavar='HOST=CONCURRENCY[:RATE[:BURST]]',
+                        help="limits for one API host, e.g. utkarsh-api.vercel.app=20:50 (repeatable; RATE in req/s, 0 = "
+                             "unlimited; defaults: --workers concurrent, 100 req/s category host, 200 req/s course host)")
+    parser.add_argument('--course-window', type=int, default=None, help="courses kept in flight (default: --workers)")
+    parser.add_argument('--large-first', action='store_true',
+                        help="schedule courses with the most subjects first (among the --large-first-buffer queued ones)")
+    parser.add_argument('--large-first-buffer', type=int, default=None, metavar='N',
+                        help="courses ranked at a time by --large-first (default: 4 x course window, 0: all, unbounded memory)")
+    parser.add_argument('--compress', choices=['none', 'gzip', 'zstd'], default='none', help="compression of ALL_RESPONSES.ndjson")
+    parser.add_argument('--retries', type=int, default=4, help="retries per request for timeouts, 429 and 5xx")
+    parser.add_argument('--metrics-interval', type=float, default=15, help="seconds between METRICS.json/METRICS.prom dumps")
+    parser.add_argument('--base-url', default=None, help="category API base (default: utk-batches-api)")
+    parser.add_argument('--api-url', default=None, help="course API base (default: utkarsh-api)")
+    parser.add_argument('--cache', action='store_true', help="keep a persistent response cache and revalidate with ETag/Last-Modified")
+    parser.add_argument('--cache-dir', default=None, help="response cache folder (default: OUTPUT_DIR/HTTP_CACHE)")
+    parser.add_argument('--cache-ttl', action='append', default=[], metavar='FAMILY=SECONDS',
+                        help="serve FAMILY from cache for SECONDS without revalidating (0 = always revalidate, -1 = no cache)")
+    parser.add_argument('--delta', action='store_true', help="only rewrite changed topics and write a link changelog to CHANGELOGS/")
+    parser.add_argument('--output', choices=['folders', 'sqlite', 'links'], default='folders',
+                        help="folders: one directory per topic; sqlite: single packed UTKARSH_PACKED.sqlite; "
+                             "links: only stream (hierarchy, title, url) records to LINKS.ndjson")
+    parser.add_argument('--export-tree', metavar='PACKED_DB', help="only build the folder tree from a packed output and exit")
+    parser.add_argument('--export-dir', default="Utkarsh_Export", help="target folder for --export-tree")
+    parser.add_argument('--no-link-index', action='store_true', help="don't maintain LINK_INDEX.sqlite (query it with utk_links.py)")
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N', help="only crawl shard I of N (0-based), e.g. one per machine")
+    parser.add_argument('--shard-by', choices=['course', 'master'], default='course',
+                        help="course: hash of course_id (balanced, no duplicates); master: hash of master_id (fewer category requests)")
+    parser.add_argument('--timeout', type=float, default=5, help="per-attempt timeout until a family has enough latency samples")
+    parser.add_argument('--fixed-timeout', action='store_true', help="always use --timeout instead of 3 x p99 of each endpoint family")
+    parser.add_argument('--hedge', action='store_true', help="duplicate topics/content requests still running after their p95 latency")
+    parser.add_argument('--hedge-quantile', type=float, default=95, help="latency percentile after which a request is hedged")
+    parser.add_argument('--hedge-rate', type=float, default=0.05, help="max fraction of a family's requests that get hedged")
+    parser.add_argument('--json-backend', choices=['auto', 'orjson', 'ujson', 'stdlib'], default='auto',
+                        help="JSON codec for responses and output files (auto: orjson > ujson > stdlib)")
+    parser.add_argument('--loop', choices=['auto', 'uvloop', 'asyncio'], default='auto', help="event loop (auto: uvloop if installed)")
+    parser.add_argument('--processes', type=int, default=1, help="run N shards as local processes and merge them into --output-dir")
+    parser.add_argument('--merge-shards', nargs='+', metavar='SHARD_DIR', help="only merge finished shard folders into --output-dir and exit")
+    args = parser.parse_args(argv)
+    
+    if args.merge_shards:
+        merge_shards(args.merge_shards, args.output_dir)
+        return
+    if args.processes > 1:
+        # Children get the same options minus --processes/--output-dir, plus their own shard
+        shard_argv = []
+        skip = False
+        for arg in (sys.argv[1:] if argv is None else argv):
+            if skip:
+                skip = False
+                continue
+            name = arg.split('=', 1)[0]
+            if name in ('--processes', '--output-dir'):
+                skip = '=' not in arg
+                continue
+            shard_argv.append(arg)
+        return run_local_shards(shard_argv, args.processes, args.output_dir)
+    
+    cache_ttl = {}
+    for item in args.cache_ttl:
+        family, _, seconds = item.partition('=')
+        cache_ttl[family] = float(seconds)
+    cache_dir = args.cache_dir or (Path(args.output_dir) / "HTTP_CACHE" if args.cache else None)
+    
+    compression = None if args.compress == 'none' else args.compress
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            print("⚠️ zstandard not installed (pip install zstandard), using gzip")
+            compression = 'gzip'
+    
+    downloader = HyperFastUtkarshDownloader(
+        max_workers=args.workers,
+        host_limits=dict(args.host_limit),
+        course_window=args.course_window,
+        large_courses_first=args.large_first,
+        large_first_buffer=args.large_first_buffer,
+        resume=args.resume,
+        compression=compression,
+        max_retries=args.retries,
+        metrics_interval=args.metrics_interval,
+        base_url=args.base_url,
+        api_url=args.api_url,
+        cache_dir=cache_dir,
+        cache_ttl=cache_ttl,
+        delta=args.delta,
+        output=args.output,
+        link_index=not args.no_link_index,
+        shard=args.shard,
+        shard_by=args.shard_by,
+        timeout=args.timeout,
+        adaptive_timeouts=not args.fixed_timeout,
+        hedge=args.hedge,
+        hedge_quantile=args.hedge_quantile,
+        hedge_rate=args.hedge_rate
+    )
+    
+    if args.export_tree:
+        downloader.export_packed_tree(args.export_tree, args.export_dir)
+        return
     
     # Set high thread limits for maximum speed
-    import os
     os.environ['PYTHONASYNCIODEBUG'] = '0'
+    json_backend = set_json_backend(args.json_backend)
+    if args.json_backend not in ('auto', json_backend):
+        print(f"⚠️ {args.json_backend} not installed, using {json_backend} JSON")
+    print(f"🧬 JSON: {json_backend} | Event loop: {install_event_loop(args.loop)}")
     
     try:
-        asyncio.run(downloader.download_hyper_fast())
+        asyncio.run(downloader.download_hyper_fast(args.output_dir))
     except KeyboardInterrupt:
-        print("\n⏹️ Stopped by user")
+        print("\n⏹️ Stopped by user (run again with --resume to continue)")
+        return 130
     except Exception as e:
         print(f"\n❌ Error: {e}")
+        return 1
+    return 0 if downloader.crawl_complete else 1
 
 if __name__ == "__main__":
-    run_hyper_fast()
\ No newline at end of file
+    sys.exit(run_hyper_fast())
@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from utk import HyperFastUtkarshDownloader, LatencyHistogram, install_event_loop, set_json_backend
+from utk_mock_server import add_catalogue_args, api_from_args
+
+CATALOGUE_ARGS = ['masters', 'subs', 'finals', 'courses', 'subjects', 'topics', 'items',
+                  'large_every', 'large_factor', 'course_pool',
+                  'latency_ms', 'latency_sigma', 'slow_rate', 'slow_factor', 'error_rate', 'odd_names', 'seed']
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_mock_server(args, port):
+    """Run utk_mock_server.py in its own process so it doesn't share the crawler's CPU"""
+    command = [sys.executable, str(Path(__file__).with_name('utk_mock_server.py')), '--port', str(port)]
+    for name in CATALOGUE_ARGS:
+        command += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("mock server did not start")
+
+def server_stats(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/__stats") as response:
+        return json.loads(response.read())
+
+def overall_latency(metrics):
+    """Merge every endpoint family's histogram into one"""
+    merged = LatencyHistogram()
+    for stats in metrics.endpoints.values():
+        merged.counts = [a + b for a, b in zip(merged.counts, stats.latency.counts)]
+        merged.count += stats.latency.count
+        merged.total += stats.latency.total
+    return merged
+
+def crawl_once(options, port, workdir, results):
+    """Child process: one crawl against the mock server, reporting its own peak RSS"""
+    os.chdir(workdir)
+    json_backend = set_json_backend(options['json_backend'])
+    loop = install_event_loop(options['loop'])
+    downloader = HyperFastUtkarshDownloader(
+        max_workers=options['workers'],
+        adaptive_timeouts=not options['fixed_timeout'],
+        hedge=options['hedge'],
+        course_window=options['course_window'],
+        large_courses_first=options['large_first'],
+        metrics_interval=3600,
+        base_url=f"http://127.0.0.1:{port}/api",
+        # A second host name gives the course API its own limiter, like production
+        api_url=f"http://localhost:{port}/api",
+        host_limits=None if options['rate'] is None else {
+            f"127.0.0.1:{port}": {'concurrency': options['workers'], 'rate': options['rate']},
+            f"localhost:{port}": {'concurrency': options['workers'], 'rate': options['rate']},
+        }
+    )
+    output = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output if not options['verbose'] else sys.stdout):
+        asyncio.run(downloader.download_hyper_fast())
+    elapsed = time.perf_counter() - started
+    
+    latency = overall_latency(downloader.metrics)
+    requests = sum(stats.requests for stats in downloader.metrics.endpoints.values())
+    links = len(downloader.all_links)
+    results.put({
+        'elapsed': round(elapsed, 3),
+        'links': links,
+        'requests': requests,
+        'failures': len(downloader.failures),
+        'json_backend': json_backend,
+        'loop': loop,
+        'links_per_sec': round(links / elapsed, 1),
+        'requests_per_sec': round(requests / elapsed, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'latency_p50_ms': round((latency.percentile(50) or 0) * 1000, 1),
+        'latency_p95_ms': round((latency.percentile(95) or 0) * 1000, 1),
+        'latency_p99_ms': round((latency.percentile(99) or 0) * 1000, 1),
+    })
+
+def run_benchmark(args):
+    port = args.port or free_port()
+    server = start_mock_server(args, port)
+    options = {'workers': args.workers, 'course_window': args.course_window, 'large_first': args.large_first,
+               'rate': args.rate, 'verbose': args.verbose, 'json_backend': args.json_backend, 'loop': args.loop,
+               'hedge': args.hedge, 'fixed_timeout': args.fixed_timeout}
+    context = multiprocessing.get_context('spawn')
+    expected_links = api_from_args(args).catalogue_size()['links']
+    runs = []
+    try:
+        for i in range(args.repeat):
+            with tempfile.TemporaryDirectory(prefix="utk_bench_") as workdir:
+                results = context.Queue()
+                before = server_stats(port)['requests']
+                child = context.Process(target=crawl_once, args=(options, port, workdir, results))
+                child.start()
+                result = results.get()
+                child.join()
+                result['server_requests'] = server_stats(port)['requests'] - before - 1
+                result['expected_links'] = expected_links
+                runs.append(result)
+                print(f"🏁 Run {i + 1}/{args.repeat}: {result['links_per_sec']} links/s | "
+                      f"{result['requests_per_sec']} req/s | p99 {result['latency_p99_ms']}ms | RSS {result['peak_rss_mb']} MB")
+    finally:
+        server.terminate()
+        server.wait()
+    return runs
+
+def summarize(runs):
+    """Median of each numeric field across runs"""
+    summary = {}
+    for key in runs[0]:
+        if isinstance(runs[0][key], str):
+            summary[key] = runs[0][key]
+            continue
+        values = sorted(run[key] for run in runs)
+        summary[key] = values[len(values) // 2]
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark of HyperFastUtkarshDownloader against the mock API")
+    add_catalogue_args(parser)
+    parser.add_argument('--port', type=int, default=0, help="mock server port (default: any free port)")
+    parser.add_argument('--workers', type=int, default=50)
+    parser.add_argument('--course-window', type=int, default=None)
+    parser.add_argument('--large-first', action='store_true')
+    parser.add_argument('--rate', type=float, default=None, help="per-host req/s limit (default: crawler defaults)")
+    parser.add_argument('--json-backend', choices=['auto', 'orjson', 'ujson', 'stdlib'], default='stdlib')
+    parser.add_argument('--loop', choices=['auto', 'uvloop', 'asyncio'], default='asyncio')
+    parser.add_argument('--hedge', action='store_true', help="hedge topics/content requests")
+    parser.add_argument('--fixed-timeout', action='store_true', help="flat 5s per-attempt timeout instead of adaptive ones")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--baseline', help="results file of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed links/sec drop vs baseline")
+    parser.add_argument('--verbose', action='store_true', help="show the crawler's own output")
+    args = parser.parse_args()
+    
+    print("🧪 UTKARSH CRAWLER BENCHMARK")
+    print("=" * 50)
+    runs = run_benchmark(args)
+    summary = summarize(runs)
+    # Without injected errors every link of the catalogue must come back (e.g. with --odd-names)
+    incomplete = [] if args.error_rate else [run for run in runs if run['links'] != run['expected_links']]
+    
+    print("\n📊 MEDIAN OF RUNS")
+    for key, value in summary.items():
+        print(f"   {key:<18} {value}")
+    
+    if args.json:
+        Path(args.json).write_text(json.dumps({'config': vars(args), 'runs': runs, 'summary': summary}, indent=1))
+        print(f"💾 Results: {args.json}")
+    
+    if incomplete:
+        print(f"\n❌ INCOMPLETE CRAWL: {incomplete[0]['links']} of {incomplete[0]['expected_links']} links with --error-rate 0")
+        sys.exit(1)
+    
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())['summary']
+        change = summary['links_per_sec'] / max(1e-9, baseline['links_per_sec']) - 1
+        print(f"\n📉 links/sec vs baseline: {change:+.1%} (p99 {baseline['latency_p99_ms']}ms -> {summary['latency_p99_ms']}ms)")
+        if change < -args.tolerance:
+            print("❌ PERFORMANCE REGRESSION")
+            sys.exit(1)
+        print("✅ Within tolerance")
+
+if __name__ == "__main__":
+    main()
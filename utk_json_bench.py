@@ -0,0 +1,61 @@
+import argparse
+import json
+import time
+
+import utk
+
+def make_payloads(topics, items):
+    """Content responses shaped like the course API's, plus their encoded bodies"""
+    payloads = [
+        {'data': [
+            {'id': i, 'title': f"Lecture {t}.{i} – वीडियो व्याख्यान", 'type': 'video', 'duration': 3600 + i,
+             'url': f"https://cdn.example.com/courses/{t}/lectures/{i}/index.m3u8?token={'x' * 40}",
+             'thumbnail': f"https://cdn.example.com/thumbs/{t}/{i}.jpg", 'is_free': i % 2 == 0}
+            for i in range(items)
+        ]}
+        for t in range(topics)
+    ]
+    return payloads, [json.dumps(payload).encode('utf-8') for payload in payloads]
+
+def measure(function, inputs, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for value in inputs:
+            function(value)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON decode/encode throughput of each backend on content-shaped payloads")
+    parser.add_argument('--topics', type=int, default=2000)
+    parser.add_argument('--items', type=int, default=30, help="content items per topic")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+    
+    payloads, bodies = make_payloads(args.topics, args.items)
+    megabytes = sum(len(body) for body in bodies) / 1e6
+    print(f"🧪 {len(bodies)} payloads, {megabytes:.1f} MB")
+    
+    results = {}
+    for name in ('stdlib', 'ujson', 'orjson'):
+        if utk.set_json_backend(name) != name:
+            print(f"   {name:<7} not installed")
+            continue
+        decode = measure(utk.json_loads, bodies, args.repeat)
+        encode = measure(utk.json_dumps, payloads, args.repeat)
+        results[name] = {'decode_mb_s': round(megabytes / decode, 1), 'encode_mb_s': round(megabytes / encode, 1)}
+        print(f"   {name:<7} decode {results[name]['decode_mb_s']:>8} MB/s | encode {results[name]['encode_mb_s']:>8} MB/s")
+    
+    if 'stdlib' in results:
+        for name, stats in results.items():
+            if name != 'stdlib':
+                print(f"⚡ {name}: decode x{stats['decode_mb_s'] / results['stdlib']['decode_mb_s']:.1f}, "
+                      f"encode x{stats['encode_mb_s'] / results['stdlib']['encode_mb_s']:.1f} vs stdlib")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from utk import LinkIndex
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the LINK_INDEX.sqlite built by utk.py")
+    parser.add_argument('--db', default=str(Path("Utkarsh_Hyper_Fast") / "LINK_INDEX.sqlite"))
+    parser.add_argument('--course', help="course ID or title substring")
+    parser.add_argument('--subject', help="subject ID or title substring")
+    parser.add_argument('--title', help="link title substring")
+    parser.add_argument('--domain', help="URL host, subdomains included")
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--placements', action='store_true', help="also list each course's master/sub/final categories")
+    parser.add_argument('--json', action='store_true', help="one JSON object per line")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"❌ No link index at {args.db}")
+        sys.exit(1)
+    index = LinkIndex(args.db)
+    started = time.perf_counter()
+    rows = index.query(course=args.course, subject=args.subject, title=args.title, domain=args.domain, limit=args.limit)
+    elapsed = time.perf_counter() - started
+
+    for row in rows:
+        if args.placements:
+            row['placements'] = [' / '.join(names) for names in index.placements(row['course_id'])]
+        if args.json:
+            print(json.dumps(row, ensure_ascii=False))
+            continue
+        print(f"{row['course']} > {row['subject']} > {row['topic']} | {row['title']}")
+        print(f"   {row['url']}")
+        for placement in row.get('placements', []):
+            print(f"   📁 {placement}")
+    index.close()
+    if not args.json:
+        print(f"\n🔎 {len(rows)} links in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
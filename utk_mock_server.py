@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import zlib
+from aiohttp import web
+
+class MockUtkarshAPI:
+    """Local stand-in for utk-batches-api / utkarsh-api with a synthetic catalogue"""
+    def __init__(self, masters=3, subs=3, finals=3, courses=4, subjects=3, topics=4, items=5,
+                 large_every=7, large_factor=5, course_pool=0,
+                 latency_ms=20, latency_sigma=0.5, slow_rate=0.01, slow_factor=10,
+                 error_rate=0.0, odd_names=0, seed=1):
+        self.masters = masters
+        self.subs = subs
+        self.finals = finals
+        self.courses = courses
+        self.subjects = subjects
+        self.topics = topics
+        self.items = items
+        # Every large_every-th course has large_factor times the subjects (long tail)
+        self.large_every = large_every
+        self.large_factor = large_factor
+        # course_pool > 0 makes final categories share courses, like the real catalogue
+        self.course_pool = course_pool
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.error_rate = error_rate
+        # odd_names > 0: every Nth name/title is null and the one after it a bare number
+        self.odd_names = odd_names
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.by_endpoint = {}
+    
+    def catalogue_size(self):
+        """Unique courses / topics / links this configuration serves"""
+        final_ids = range(self.masters * self.subs * self.finals)
+        placements = sum(len(self.course_ids(final_id)) for final_id in final_ids)
+        unique_courses = {course_id for final_id in final_ids for course_id in self.course_ids(final_id)}
+        subjects = sum(self.subject_count(course_id) for course_id in unique_courses)
+        return {
+            'placements': placements,
+            'courses': len(unique_courses),
+            'topics': subjects * self.topics,
+            'links': subjects * self.topics * self.items,
+        }
+    
+    def subject_count(self, course_id):
+        if self.large_every and course_id % self.large_every == 0:
+            return self.subjects * self.large_factor
+        return self.subjects
+    
+    def course_ids(self, final_id):
+        ids = [final_id * self.courses + i for i in range(self.courses)]
+        if self.course_pool:
+            ids = [(course_id * 7919) % self.course_pool for course_id in ids]
+        return list(dict.fromkeys(ids))
+    
+    def name(self, text, number):
+        if self.odd_names:
+            if number % self.odd_names == 1:
+                return None
+            if number % self.odd_names == 2:
+                return number
+        return text
+    
+    async def delay(self):
+        median = self.latency_ms / 1000
+        seconds = median * math.exp(self.random.gauss(0, self.latency_sigma)) if median else 0
+        if self.random.random() < self.slow_rate:
+            seconds *= self.slow_factor
+        if seconds:
+            await asyncio.sleep(seconds)
+    
+    def reply(self, request, payload):
+        """JSON response with an ETag; a matching If-None-Match gets a 304"""
+        body = json.dumps(payload).encode('utf-8')
+        etag = f'"{zlib.crc32(body):08x}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=body, content_type='application/json', headers={'ETag': etag})
+    
+    @web.middleware
+    async def middleware(self, request, handler):
+        self.requests += 1
+        endpoint = request.match_info.route.name or 'other'
+        self.by_endpoint[endpoint] = self.by_endpoint.get(endpoint, 0) + 1
+        if request.path == '/__stats':
+            return await handler(request)
+        await self.delay()
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            status = self.random.choice([429, 500, 502, 503, 504])
+            headers = {'Retry-After': '0'} if status == 429 else None
+            return web.Response(status=status, headers=headers)
+        return await handler(request)
+    
+    async def masters_handler(self, request):
+        return self.reply(request, {'data': [{'id': m, 'name': self.name(f"Master {m}", m)} for m in range(self.masters)]})
+    
+    async def subs_handler(self, request):
+        m = int(request.query['master_id'])
+        return self.reply(request, {'data': [{'id': m * self.subs + s, 'name': self.name(f"Sub {m}.{s}", s)} for s in range(self.subs)]})
+    
+    async def finals_handler(self, request):
+        sub_id = int(request.query['subcat_id'])
+        return self.reply(request, {'data': [{'id': sub_id * self.finals + f, 'name': self.name(f"Final {sub_id}.{f}", f)} for f in range(self.finals)]})
+    
+    async def courses_handler(self, request):
+        final_id = int(request.query['sub_cat_id'])
+        return self.reply(request, {'data': [{'id': c, 'title': self.name(f"Course {c}", c)} for c in self.course_ids(final_id)]})
+    
+    async def batch_handler(self, request):
+        course_id = int(request.match_info['course_id'])
+        subjects = [{'id': s, 'title': self.name(f"Subject {s}", s)} for s in range(self.subject_count(course_id))]
+        return self.reply(request, {'data': {'id': course_id, 'subjects': subjects}})
+    
+    async def topics_handler(self, request):
+        return self.reply(request, {'data': [{'id': t, 'title': self.name(f"Topic {t}", t)} for t in range(self.topics)]})
+    
+    async def content_handler(self, request):
+        c, s, t = (request.match_info[key] for key in ('course_id', 'subject_id', 'topic_id'))
+        return self.reply(request, {'data': [
+            {'id': i, 'title': self.name(f"Lecture {c}.{s}.{t}.{i}", i), 'url': f"https://cdn.example.com/{c}/{s}/{t}/{i}.mp4"}
+            for i in range(self.items)
+        ]})
+    
+    async def stats_handler(self, request):
+        return web.json_response({'requests': self.requests, 'errors': self.errors, 'by_endpoint': self.by_endpoint})
+    
+    def make_app(self):
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get('/api/master-categories', self.masters_handler, name='master-categories')
+        app.router.add_get('/api/subcategories', self.subs_handler, name='subcategories')
+        app.router.add_get('/api/final-categories', self.finals_handler, name='final-categories')
+        app.router.add_get('/api/courses', self.courses_handler, name='courses')
+        app.router.add_get('/api/batch/{course_id}', self.batch_handler, name='batch')
+        app.router.add_get('/api/course/{course_id}/subject/{subject_id}/topics', self.topics_handler, name='topics')
+        app.router.add_get('/api/course/{course_id}/subject/{subject_id}/topic/{topic_id}/content', self.content_handler, name='content')
+        app.router.add_get('/__stats', self.stats_handler, name='stats')
+        return app
+
+def add_catalogue_args(parser):
+    """Catalogue/latency options shared with utk_bench.py"""
+    parser.add_argument('--masters', type=int, default=3)
+    parser.add_argument('--subs', type=int, default=3, help="subcategories per master")
+    parser.add_argument('--finals', type=int, default=3, help="final categories per subcategory")
+    parser.add_argument('--courses', type=int, default=4, help="courses per final category")
+    parser.add_argument('--subjects', type=int, default=3, help="subjects per course")
+    parser.add_argument('--topics', type=int, default=4, help="topics per subject")
+    parser.add_argument('--items', type=int, default=5, help="content items (links) per topic")
+    parser.add_argument('--large-every', type=int, default=7, help="every Nth course is a large one (0 = none)")
+    parser.add_argument('--large-factor', type=int, default=5, help="subject multiplier for large courses")
+    parser.add_argument('--course-pool', type=int, default=0, help="share courses across categories from a pool of N ids")
+    parser.add_argument('--latency-ms', type=float, default=20, help="median response latency")
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help="log-normal spread of latency")
+    parser.add_argument('--slow-rate', type=float, default=0.01, help="fraction of responses that are slow_factor times slower")
+    parser.add_argument('--slow-factor', type=float, default=10)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of 429/5xx responses")
+    parser.add_argument('--odd-names', type=int, default=0, metavar='N',
+                        help="every Nth name/title is null and the next a number, like some real API rows (0 = off)")
+    parser.add_argument('--seed', type=int, default=1)
+
+def api_from_args(args):
+    return MockUtkarshAPI(
+        masters=args.masters, subs=args.subs, finals=args.finals, courses=args.courses,
+        subjects=args.subjects, topics=args.topics, items=args.items,
+        large_every=args.large_every, large_factor=args.large_factor, course_pool=args.course_pool,
+        latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+        slow_rate=args.slow_rate, slow_factor=args.slow_factor,
+        error_rate=args.error_rate, odd_names=args.odd_names, seed=args.seed
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Utkarsh API server for offline benchmarks")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8088)
+    add_catalogue_args(parser)
+    args = parser.parse_args()
+    
+    api = api_from_args(args)
+    size = api.catalogue_size()
+    print(f"🧪 Mock API on http://{args.host}:{args.port}/api")
+    print(f"📚 {size['placements']} course placements | {size['courses']} courses | {size['topics']} topics | {size['links']} links")
+    web.run_app(api.make_app(), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 import os
 import requests
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
 import time
+from link_extract import extract, has_rel
 
 class WebsiteDownloader:
     def __init__(self):
@@ -64,32 +64,16 @@ class WebsiteDownloader:
     
     def extract_links(self, html_content, base_url):
         """Extract all relevant links from HTML content"""
-        soup = BeautifulSoup(html_content, 'html.parser')
         links = []
         
-        # Extract CSS links
-        for link in soup.find_all('link', rel='stylesheet'):
-            href = link.get('href')
-            if href:
-                links.append(urljoin(base_url, href))
-        
-        # Extract JavaScript files
-        for script in soup.find_all('script', src=True):
-            src = script.get('src')
-            if src:
-                links.append(urljoin(base_url, src))
-        
-        # Extract PHP and HTML links
-        for a in soup.find_all('a', href=True):
-            href = a.get('href')
-            if href and (href.endswith('.php') or href.endswith('.html') or href.endswith('.htm')):
-                links.append(urljoin(base_url, href))
-        
-        # Extract images that might be in CSS
-        for img in soup.find_all('img', src=True):
-            src = img.get('src')
-            if src:
-                links.append(urljoin(base_url, src))
+        # CSS links, JavaScript files, PHP/HTML links and images in one pass
+        wanted = {'link': ('href',), 'script': ('src',), 'a': ('href',), 'img': ('src',)}
+        for tag, attr, value, attrs in extract(html_content, wanted):
+            if tag == 'link' and not has_rel(attrs, 'stylesheet'):
+                continue
+            if tag == 'a' and not value.endswith(('.php', '.html', '.htm')):
+                continue
+            links.append(urljoin(base_url, value))
         
         return list(set(links))  # Remove duplicates
     
@@ -2,13 +2,186 @@ import requests
 import os
 import time
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
 import concurrent.futures
+import multiprocessing
 import re
 import json
+import asyncio
+from collections import deque
+import aiohttp
+import link_extract
+import js_scan
 
-class UltimateWebsiteDownloader:
-    def __init__(self):
+class CrawlFrontier:
+    """BFS क्रॉल फ्रंटियर: deque + seen-set, push/pop/dedup सब O(1)"""
+    def __init__(self, seen=None):
+        self.queue = deque()
+        # जो URLs कभी queue में आए या visit हो चुके
+        self.seen = set(seen or ())
+    
+    def mark(self, url):
+        """URL को seen में डालें; पहले से देखा हुआ हो तो False"""
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        return True
+    
+    def push(self, url, depth):
+        """नया URL जोड़ें; पहले से देखा हुआ हो तो False"""
+        if not self.mark(url):
+            return False
+        self.queue.append((url, depth))
+        return True
+    
+    def pop(self):
+        return self.queue.popleft()
+    
+    def __contains__(self, url):
+        return url in self.seen
+    
+    def __len__(self):
+        return len(self.queue)
+
+class HostPoliteness:
+    """हर host पर दो requests के बीच कम से कम delay सेकंड (सभी fetchers मिलाकर)"""
+    def __init__(self, delay=0.3):
+        self.delay = delay
+        self.next_slot = {}
+    
+    async def wait(self, url):
+        if not self.delay:
+            return
+        host = urlparse(url).netloc
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # slot पहले ही reserve करें ताकि एक साथ आए fetchers लाइन में लगें
+        slot = max(now, self.next_slot.get(host, now))
+        self.next_slot[host] = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class ParseStage:
+    """HTML/JS पार्सिंग stage: raw bytes अंदर, सिर्फ URL list बाहर। processes > 0 हो तो
+    पहले pool_after documents threads में, फिर ProcessPoolExecutor में - ताकि छोटे क्रॉल
+    process startup का खर्च न उठाएं और बड़े क्रॉल GIL से आगे सभी cores इस्तेमाल करें"""
+    def __init__(self, parser, processes=0, pool_after=50):
+        self.parser = parser
+        self.processes = processes
+        self.pool_after = pool_after
+        self.parsed = 0
+        self.pool = None
+    
+    async def parse(self, url, content, content_type):
+        self.parsed += 1
+        if self.pool is None and self.processes and self.parsed > self.pool_after:
+            # spawn: fork एक चलते event loop और उसके threads की कॉपी बनाता
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context('spawn'))
+            print(f"   ⚙️ {self.pool_after} पेज के बाद पार्सिंग {self.processes} processes में")
+        if self.pool is None:
+            return await asyncio.to_thread(self.parser.parse, url, content, content_type)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, self.parser.parse, url, content, content_type)
+    
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+class LinkParser:
+    """पेज/JS से लिंक्स निकालने का हिस्सा; सिर्फ base_url और domain रखता है,
+    इसलिए process pool में भेजा जा सकता है"""
+    # HTML टैग्स और उनके लिंक वाले attributes
+    HTML_LINK_ATTRS = {
+        'a': ('href',),
+        'link': ('href',),
+        'script': ('src',),
+        'img': ('src',),
+        'source': ('src',),
+        'audio': ('src',),
+        'video': ('src',),
+        'iframe': ('src',),
+        'form': ('action',),
+        'meta': ('content',),
+    }
+    
+    def __init__(self, base_url="", domain=""):
+        self.base_url = base_url
+        self.domain = domain
+    
+    def parse(self, url, content, content_type):
+        """raw bytes से लिंक्स: HTML पेज के सभी, JavaScript फाइल के URLs, बाकी कुछ नहीं"""
+        if 'text/html' in content_type:
+            extract = self.extract_all_links_from_content
+        elif self.is_javascript(url, content_type):
+            extract = self.extract_urls_from_javascript
+        else:
+            return []
+        return extract(content.decode('utf-8', errors='replace'), url)
+    
+    def extract_all_links_from_content(self, content, base_url):
+        """कंटेंट से सभी लिंक्स निकालें (HTML + JavaScript)"""
+        urls = set()
+        
+        # HTML लिंक्स - सभी टैग्स एक ही pass में
+        for tag, attr, url, attrs in link_extract.extract(content, self.HTML_LINK_ATTRS):
+            full_url = self.normalize_url(url, base_url)
+            if self.is_same_domain(full_url):
+                urls.add(full_url)
+        
+        # CSS में URLs
+        css_urls = re.findall(r'url\([\'"]?([^\'")]+)[\'"]?\)', content)
+        for css_url in css_urls:
+            full_url = self.normalize_url(css_url, base_url)
+            if self.is_same_domain(full_url):
+                urls.add(full_url)
+        
+        # JavaScript में URLs - एडवांस्ड डिटेक्शन
+        js_urls = self.extract_urls_from_javascript(content, base_url, html=True)
+        urls.update(js_urls)
+        
+        return list(urls)
+    
+    def extract_urls_from_javascript(self, content, base_url, html=False):
+        """JavaScript कोड से URLs निकालें - fetch/XHR/axios endpoints और asset paths,
+        सभी string literals एक ही linear pass में (js_scan देखें)"""
+        urls = set()
+        found = js_scan.scan_html(content) if html else js_scan.scan(content)
+        for kind, match in found:
+            if kind == 'template':
+                continue
+            full_url = self.normalize_url(match, base_url)
+            if self.is_same_domain(full_url):
+                urls.add(full_url)
+        return list(urls)
+    
+    def is_javascript(self, url, content_type):
+        return 'javascript' in content_type or urlparse(url).path.endswith(('.js', '.mjs'))
+    
+    def normalize_url(self, url, base_url):
+        """URL को पूरा URL में कन्वर्ट करें"""
+        if url.startswith('//'):
+            return 'https:' + url
+        elif url.startswith('/'):
+            return urljoin(self.base_url, url)
+        elif url.startswith('./'):
+            return urljoin(base_url, url)
+        elif url.startswith('../'):
+            return urljoin(base_url, url)
+        elif not url.startswith('http'):
+            return urljoin(base_url, url)
+        else:
+            return url
+    
+    def is_same_domain(self, url):
+        """चेक करें कि URL same domain का है"""
+        try:
+            return urlparse(url).netloc == self.domain
+        except:
+            return False
+
+class UltimateWebsiteDownloader(LinkParser):
+    def __init__(self, concurrency=8, delay=0.3, parse_processes=None, parse_pool_after=50):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -18,6 +191,15 @@ class UltimateWebsiteDownloader:
         self.base_url = ""
         self.domain = ""
         self.visited_urls = set()
+        # async engine: एक साथ चलने वाले fetchers और per-host politeness delay
+        # (0.3s = पुराने sequential क्रॉल जितना; छोटा delay सिर्फ अपनी साइट्स के लिए)
+        self.concurrency = concurrency
+        self.delay = delay
+        # पार्सिंग processes: None = cores - 1, 0 = सिर्फ threads; pool पहले parse_pool_after पेज के बाद शुरू होता है
+        if parse_processes is None:
+            parse_processes = max(0, (os.cpu_count() or 1) - 1)
+        self.parse_processes = parse_processes
+        self.parse_pool_after = parse_pool_after
     
     def get_user_input(self):
         """यूजर से URL और फोल्डर नाम लें"""
@@ -38,8 +220,25 @@ class UltimateWebsiteDownloader:
         if not folder_name:
             folder_name = urlparse(website_url).netloc.replace('www.', '') + "_website"
         
+        # Politeness: खाली Enter पर default रहता है
+        self.concurrency = self.ask_number(f"एक साथ कितने fetchers (default {self.concurrency}): ", int, self.concurrency, 1)
+        self.delay = self.ask_number(f"हर host पर requests के बीच कम से कम सेकंड (default {self.delay}): ", float, self.delay, 0)
+        
         return website_url, folder_name
     
+    @staticmethod
+    def ask_number(prompt, kind, default, minimum):
+        """input() से संख्या; खाली या गलत जवाब पर default"""
+        answer = input(prompt).strip()
+        if not answer:
+            return default
+        try:
+            value = kind(answer)
+        except ValueError:
+            print(f"⚠️ '{answer}' संख्या नहीं है, {default} इस्तेमाल कर रहा हूँ")
+            return default
+        return max(minimum, value)
+    
     def download_complete_website(self, website_url, folder_name):
         """पूरी वेबसाइट डाउनलोड करें"""
         self.base_url = website_url
@@ -53,12 +252,9 @@ class UltimateWebsiteDownloader:
         if not os.path.exists(folder_name):
             os.makedirs(folder_name)
         
-        # स्टेप 1: मुख्य पेज डाउनलोड करें और सभी लिंक्स ढूंढें
+        # क्रॉल और रिसोर्स डाउनलोड एक साथ (async engine)
         print("📄 मुख्य पेज डाउनलोड कर रहा हूँ...")
-        all_urls = self.recursive_crawl(website_url, max_depth=3)
-        
-        # स्टेप 2: सभी फाइल्स डाउनलोड करें
-        self.download_all_resources(all_urls)
+        asyncio.run(self.async_crawl(website_url, max_depth=3))
         
         print(f"\n✅ डाउनलोड पूरा! कुल {len(self.downloaded_files)} फाइल्स")
         self.show_report()
@@ -68,10 +264,11 @@ class UltimateWebsiteDownloader:
         print(f"🕸️ Recursive crawling शुरू (max depth: {max_depth})...")
         
         all_urls = set()
-        to_crawl = [(start_url, 0)]  # (url, depth)
+        to_crawl = CrawlFrontier(seen=self.visited_urls)
+        to_crawl.push(start_url, 0)
         
         while to_crawl:
-            current_url, depth = to_crawl.pop(0)
+            current_url, depth = to_crawl.pop()
             
             if current_url in self.visited_urls or depth > max_depth:
                 continue
@@ -86,16 +283,20 @@ class UltimateWebsiteDownloader:
                     # फाइल सेव करें
                     self.save_file(current_url, response.content, response.headers.get('content-type', ''))
                     
-                    # HTML पेज है तो लिंक्स निकालें
-                    if 'text/html' in response.headers.get('content-type', ''):
+                    # HTML पेज है तो लिंक्स निकालें, JavaScript फाइल है तो उसके URLs
+                    new_urls = []
+                    content_type = response.headers.get('content-type', '')
+                    if 'text/html' in content_type:
                         new_urls = self.extract_all_links_from_content(response.text, current_url)
-                        
-                        # नए URLs जोड़ें
-                        for url in new_urls:
-                            if url not in self.visited_urls and url not in [u for u, d in to_crawl]:
-                                if self.should_crawl(url, depth):
-                                    to_crawl.append((url, depth + 1))
-                                all_urls.add(url)
+                    elif self.is_javascript(current_url, content_type):
+                        new_urls = self.extract_urls_from_javascript(response.text, current_url)
+                    
+                    # नए URLs जोड़ें
+                    for url in new_urls:
+                        if url not in to_crawl:
+                            if self.should_crawl(url, depth):
+                                to_crawl.push(url, depth + 1)
+                            all_urls.add(url)
                     
                     all_urls.add(current_url)
                     
@@ -107,120 +308,119 @@ class UltimateWebsiteDownloader:
         print(f"   📊 कुल {len(all_urls)} URLs मिले")
         return all_urls
     
-    def extract_all_links_from_content(self, content, base_url):
-        """कंटेंट से सभी लिंक्स निकालें (HTML + JavaScript)"""
-        urls = set()
+    async def async_crawl(self, start_url, max_depth=3):
+        """aiohttp क्रॉल: self.concurrency fetchers एक shared frontier से पेज लेते हैं,
+        और जो फाइल्स क्रॉल नहीं होंगी वो उसी समय download workers को जाती हैं"""
+        print(f"🕸️ Async crawling शुरू (max depth: {max_depth}, fetchers: {self.concurrency}, delay: {self.delay}s/host, parse processes: {self.parse_processes})...")
         
-        # HTML लिंक्स
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # सभी HTML टैग्स
-        html_tags = [
-            ('a', 'href'),
-            ('link', 'href'),
-            ('script', 'src'),
-            ('img', 'src'),
-            ('source', 'src'),
-            ('audio', 'src'),
-            ('video', 'src'),
-            ('iframe', 'src'),
-            ('form', 'action'),
-            ('meta', 'content')
-        ]
-        
-        for tag_name, attr in html_tags:
-            for tag in soup.find_all(tag_name, {attr: True}):
-                url = tag.get(attr)
-                if url:
-                    full_url = self.normalize_url(url, base_url)
-                    if self.is_same_domain(full_url):
-                        urls.add(full_url)
-        
-        # CSS में URLs
-        css_urls = re.findall(r'url\([\'"]?([^\'")]+)[\'"]?\)', content)
-        for css_url in css_urls:
-            full_url = self.normalize_url(css_url, base_url)
-            if self.is_same_domain(full_url):
-                urls.add(full_url)
-        
-        # JavaScript में URLs - एडवांस्ड डिटेक्शन
-        js_urls = self.extract_urls_from_javascript(content, base_url)
-        urls.update(js_urls)
-        
-        return list(urls)
-    
-    def extract_urls_from_javascript(self, content, base_url):
-        """JavaScript कोड से URLs निकालें"""
-        urls = set()
-        
-        # fetch() और XMLHttpRequest calls
-        fetch_patterns = [
-            r'fetch\([\'"]([^\'"]+)[\'"]\)',
-            r'\.open\([\'"]GET[\'"],\s*[\'"]([^\'"]+)[\'"]\)',
-            r'\.open\([\'"]POST[\'"],\s*[\'"]([^\'"]+)[\'"]\)',
-            r'axios\.(?:get|post)\([\'"]([^\'"]+)[\'"]\)',
-            r'\.get\([\'"]([^\'"]+)[\'"]\)',
-            r'\.post\([\'"]([^\'"]+)[\'"]\)',
-        ]
-        
-        for pattern in fetch_patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                full_url = self.normalize_url(match, base_url)
-                if self.is_same_domain(full_url):
-                    urls.add(full_url)
-        
-        # URL strings in JavaScript
-        url_patterns = [
-            r'[\'\"](/[^\'\"\s]+\.(?:html|css|js|json|txt|xml))[\'\"]',
-            r'[\'\"](\./[^\'\"\s]+\.(?:html|css|js|json|txt|xml))[\'\"]',
-            r'[\'\"](\.\.[^\'\"\s]+\.(?:html|css|js|json|txt|xml))[\'\"]',
-            r'[\'\"]([^\'\"\s]+/[\w\-]+\.(?:html|css|js|json|txt|xml))[\'\"]',
-        ]
-        
-        for pattern in url_patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                full_url = self.normalize_url(match, base_url)
-                if self.is_same_domain(full_url):
-                    urls.add(full_url)
-        
-        # JSON data में URLs
-        json_patterns = [
-            r'[\'"]url[\'"]\s*:\s*[\'"]([^\'"]+)[\'"]',
-            r'[\'"]src[\'"]\s*:\s*[\'"]([^\'"]+)[\'"]',
-            r'[\'"]href[\'"]\s*:\s*[\'"]([^\'"]+)[\'"]',
-            r'[\'"]file[\'"]\s*:\s*[\'"]([^\'"]+)[\'"]',
-            r'[\'"]path[\'"]\s*:\s*[\'"]([^\'"]+)[\'"]',
-        ]
-        
-        for pattern in json_patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                full_url = self.normalize_url(match, base_url)
-                if self.is_same_domain(full_url):
-                    urls.add(full_url)
-        
-        # Array में URLs (जैसे batch files)
-        array_patterns = [
-            r'=\s*\[(.*?)\]',
-            r'const\s+\w+\s*=\s*\[(.*?)\]',
-            r'let\s+\w+\s*=\s*\[(.*?)\]',
-            r'var\s+\w+\s*=\s*\[(.*?)\]',
-        ]
-        
-        for pattern in array_patterns:
-            matches = re.findall(pattern, content, re.DOTALL)
-            for match in matches:
-                # Array items निकालें
-                items = re.findall(r'[\'"]([^\'"]+)[\'"]', match)
-                for item in items:
-                    if any(ext in item for ext in ['.html', '.css', '.js', '.txt', '.json', '.xml']):
-                        full_url = self.normalize_url(item, base_url)
-                        if self.is_same_domain(full_url):
-                            urls.add(full_url)
+        all_urls = set()
+        frontier = CrawlFrontier(seen=self.visited_urls)
+        pages = asyncio.Queue()
+        downloads = asyncio.Queue()
+        queued_downloads = set()
+        politeness = HostPoliteness(self.delay)
+        parse_stage = ParseStage(LinkParser(self.base_url, self.domain), self.parse_processes, self.parse_pool_after)
+        
+        # frontier सिर्फ dedup करता है, काम asyncio queue से बंटता है
+        def enqueue_page(url, depth):
+            if frontier.mark(url):
+                pages.put_nowait((url, depth))
+        
+        def enqueue_download(url):
+            if url not in queued_downloads and url not in self.downloaded_files and self.should_download(url):
+                queued_downloads.add(url)
+                downloads.put_nowait(url)
+        
+        async def extract_links(url, content, content_type, depth=None):
+            # HTML पेज है तो लिंक्स निकालें, JavaScript फाइल है तो उसके URLs
+            # depth=None: मिले URLs सिर्फ डाउनलोड होंगे, क्रॉल नहीं
+            if 'text/html' not in content_type and not self.is_javascript(url, content_type):
+                return
+            new_urls = await parse_stage.parse(url, content, content_type)
+            for new_url in new_urls:
+                if new_url in frontier:
+                    continue
+                if depth is not None and self.should_crawl(new_url, depth):
+                    enqueue_page(new_url, depth + 1)
+                else:
+                    enqueue_download(new_url)
+                all_urls.add(new_url)
+        
+        async def fetch(session, url):
+            await politeness.wait(url)
+            async with session.get(url) as response:
+                return response.status, await response.read(), response.headers.get('content-type', '')
+        
+        async def crawl_page(session, current_url, depth):
+            if current_url in self.visited_urls:
+                return
+            if depth > max_depth:
+                # depth limit से बाहर: पेज सिर्फ डाउनलोड होगा, उसके लिंक्स नहीं
+                enqueue_download(current_url)
+                return
+            self.visited_urls.add(current_url)
+            print(f"   🔍 Depth {depth}: {self.get_display_url(current_url)}")
+            
+            status, content, content_type = await fetch(session, current_url)
+            if status != 200:
+                return
+            await asyncio.to_thread(self.save_file, current_url, content, content_type)
+            self.downloaded_files.add(current_url)
+            all_urls.add(current_url)
+            
+            await extract_links(current_url, content, content_type, depth)
         
-        return list(urls)
+        async def crawl_worker(session):
+            while True:
+                current_url, depth = await pages.get()
+                try:
+                    await crawl_page(session, current_url, depth)
+                except Exception as e:
+                    print(f"   ❌ क्रॉल त्रुटि: {e}")
+                finally:
+                    pages.task_done()
+        
+        async def download_worker(session):
+            while True:
+                url = await downloads.get()
+                try:
+                    status, content, content_type = await fetch(session, url)
+                    if status == 200:
+                        await asyncio.to_thread(self.save_file, url, content, content_type)
+                        self.downloaded_files.add(url)
+                        # डाउनलोड हुई JS फाइल्स भी स्कैन करें; task_done से पहले, ताकि
+                        # उनमें मिली फाइल्स downloads.join() में गिनी जाएं
+                        if self.is_javascript(url, content_type):
+                            await extract_links(url, content, content_type)
+                    elif status == 404:
+                        print(f"   ❌ {self.get_filename(url)} - नहीं मिली (404)")
+                    else:
+                        print(f"   ⚠️ {self.get_filename(url)} - स्टेटस: {status}")
+                except Exception as e:
+                    print(f"   ❌ {self.get_filename(url)} - त्रुटि: {e}")
+                finally:
+                    downloads.task_done()
+        
+        async with aiohttp.ClientSession(
+            headers=dict(self.session.headers),
+            timeout=aiohttp.ClientTimeout(total=15),
+            connector=aiohttp.TCPConnector(limit=self.concurrency * 2)
+        ) as session:
+            enqueue_page(start_url, 0)
+            workers = [asyncio.create_task(crawl_worker(session)) for _ in range(self.concurrency)]
+            workers += [asyncio.create_task(download_worker(session)) for _ in range(self.concurrency)]
+            try:
+                # पेज खत्म होने के बाद नए downloads नहीं आते
+                await pages.join()
+                await downloads.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                parse_stage.close()
+        
+        print(f"   📊 कुल {len(all_urls)} URLs मिले, {len(queued_downloads)} रिसोर्सेज साथ-साथ डाउनलोड हुए")
+        return all_urls
     
     def should_crawl(self, url, depth):
         """चेक करें कि URL को क्रॉल करना चाहिए"""
@@ -345,28 +545,6 @@ class UltimateWebsiteDownloader:
         
         return os.path.join(self.folder_name, path)
     
-    def normalize_url(self, url, base_url):
-        """URL को पूरा URL में कन्वर्ट करें"""
-        if url.startswith('//'):
-            return 'https:' + url
-        elif url.startswith('/'):
-            return urljoin(self.base_url, url)
-        elif url.startswith('./'):
-            return urljoin(base_url, url)
-        elif url.startswith('../'):
-            return urljoin(base_url, url)
-        elif not url.startswith('http'):
-            return urljoin(base_url, url)
-        else:
-            return url
-    
-    def is_same_domain(self, url):
-        """चेक करें कि URL same domain का है"""
-        try:
-            return urlparse(url).netloc == self.domain
-        except:
-            return False
-    
     def get_display_url(self, url):
         """डिस्प्ले के लिए छोटा URL बनाएं"""
         return url.replace(self.base_url, '') or '/'
@@ -451,10 +629,10 @@ if __name__ == "__main__":
     # लाइब्रेरीज चेक करें
     try:
         import requests
-        from bs4 import BeautifulSoup
+        import aiohttp
     except ImportError:
         print("❌ जरूरी लाइब्रेरीज इंस्टॉल नहीं हैं!")
-        print("इंस्टॉल करें: pip install requests beautifulsoup4")
+        print("इंस्टॉल करें: pip install requests aiohttp (तेज़ पार्सिंग के लिए वैकल्पिक: selectolax या lxml)")
         exit(1)
     
     main()
\ No newline at end of file
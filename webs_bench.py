@@ -0,0 +1,94 @@
+import argparse
+import json
+import random
+import time
+
+from webs import CrawlFrontier
+
+class ListFrontier:
+    """The old recursive_crawl bookkeeping: list + pop(0) + rebuilt membership list"""
+    def __init__(self, seen=None):
+        self.items = []
+        # the live visited_urls set, as the old code checked it
+        self.visited = seen if seen is not None else set()
+
+    def push(self, url, depth):
+        if url in self.visited or url in [u for u, d in self.items]:
+            return False
+        self.items.append((url, depth))
+        return True
+
+    def pop(self):
+        return self.items.pop(0)
+
+    def __contains__(self, url):
+        return url in self.visited or url in [u for u, d in self.items]
+
+    def __len__(self):
+        return len(self.items)
+
+def make_graph(pages, links_per_page, seed=1):
+    """Site-like link graph: every page links to the nav bar, its neighbours and random pages"""
+    rng = random.Random(seed)
+    urls = [f"https://example.com/page/{i}.html" for i in range(pages)]
+    nav = urls[:10]
+    graph = {}
+    for i, url in enumerate(urls):
+        links = nav + urls[i + 1:i + 4] + [urls[rng.randrange(pages)] for _ in range(links_per_page)]
+        graph[url] = links
+    return urls[0], graph
+
+def crawl(frontier_class, start, graph, max_depth=1000):
+    """recursive_crawl's frontier loop without the network, parsing and politeness sleep"""
+    visited = set()
+    frontier = frontier_class(seen=visited)
+    frontier.push(start, 0)
+    while frontier:
+        url, depth = frontier.pop()
+        if url in visited or depth > max_depth:
+            continue
+        visited.add(url)
+        for link in graph[url]:
+            if link not in frontier:
+                frontier.push(link, depth + 1)
+    return len(visited)
+
+def main():
+    parser = argparse.ArgumentParser(description="Frontier scaling of UltimateWebsiteDownloader.recursive_crawl on synthetic link graphs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 2000, 5000, 10000, 20000])
+    parser.add_argument('--links', type=int, default=20, help="random links per page (plus nav and neighbours)")
+    parser.add_argument('--old-limit', type=int, default=5000, help="largest size to run the old list frontier on")
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    print("🧪 CRAWL FRONTIER BENCHMARK")
+    print("=" * 60)
+    print(f"{'pages':>8} {'links':>9} {'deque ms':>10} {'ns/link':>8} {'list ms':>10} {'ns/link':>8}")
+    results = []
+    for size in args.sizes:
+        start, graph = make_graph(size, args.links)
+        edges = sum(len(links) for links in graph.values())
+        row = {'pages': size, 'links': edges}
+        for name, frontier_class in (('deque', CrawlFrontier), ('list', ListFrontier)):
+            if name == 'list' and size > args.old_limit:
+                continue
+            started = time.perf_counter()
+            visited = crawl(frontier_class, start, graph)
+            elapsed = time.perf_counter() - started
+            row[f"{name}_ms"] = round(elapsed * 1000, 1)
+            row[f"{name}_ns_per_link"] = round(elapsed / edges * 1e9, 1)
+            row['visited'] = visited
+        results.append(row)
+        print(f"{size:>8} {edges:>9} {row['deque_ms']:>10} {row['deque_ns_per_link']:>8} "
+              f"{row.get('list_ms', '-'):>10} {row.get('list_ns_per_link', '-'):>8}")
+
+    # Linear scaling: time per link stays flat as the site grows
+    first, last = results[0], results[-1]
+    growth = last['deque_ns_per_link'] / max(1e-9, first['deque_ns_per_link'])
+    print(f"\n📈 deque frontier: ns/link x{growth:.2f} from {first['pages']} to {last['pages']} pages")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=1)
+
+if __name__ == "__main__":
+    main()
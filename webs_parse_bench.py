@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+from webs import LinkParser, ParseStage
+
+DEFAULT_PAGES = ['ccc.html', 'pw/study.php', 'pw/study_1.php']
+
+async def run_stage(parser, documents, processes, pool_after, concurrency):
+    """documents को ParseStage से, concurrency parses एक साथ - जैसे async_crawl के fetchers"""
+    stage = ParseStage(parser, processes, pool_after)
+    queue = asyncio.Queue()
+    for document in documents:
+        queue.put_nowait(document)
+    found = 0
+
+    async def worker():
+        nonlocal found
+        while not queue.empty():
+            url, content = queue.get_nowait()
+            urls = await stage.parse(url, content, 'text/html')
+            found += len(urls)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        stage.close()
+    return time.perf_counter() - started, found
+
+def main():
+    parser = argparse.ArgumentParser(description="Thread vs process-pool parse stage of webs.py on real pages")
+    parser.add_argument('pages', nargs='*', default=DEFAULT_PAGES)
+    parser.add_argument('--documents', type=int, default=400, help="pages to parse (the inputs repeated)")
+    parser.add_argument('--processes', type=int, nargs='+', default=[0, 2, os.cpu_count() or 1])
+    parser.add_argument('--pool-after', type=int, default=0, help="documents parsed in threads before the pool starts")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    inputs = [(f"https://www.example.com/{Path(page).name}", Path(page).read_bytes()) for page in args.pages if Path(page).exists()]
+    documents = [inputs[i % len(inputs)] for i in range(args.documents)]
+    link_parser = LinkParser("https://www.example.com/", "www.example.com")
+    megabytes = sum(len(content) for url, content in documents) / 1e6
+
+    print("🧪 PARSE STAGE BENCHMARK")
+    print(f"📄 {len(documents)} documents, {megabytes:.1f} MB, {os.cpu_count()} CPUs")
+    print("=" * 60)
+    results = []
+    for processes in dict.fromkeys(args.processes):
+        elapsed, found = asyncio.run(run_stage(link_parser, documents, processes, args.pool_after, args.concurrency))
+        row = {'processes': processes, 'elapsed': round(elapsed, 3), 'docs_per_sec': round(len(documents) / elapsed, 1),
+               'links': found}
+        results.append(row)
+        label = 'threads' if not processes else f"{processes} processes"
+        print(f"   {label:<14} {row['elapsed']:>7}s  {row['docs_per_sec']:>8} docs/s  {found} links")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=1)
+
+if __name__ == "__main__":
+    main()